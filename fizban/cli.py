@@ -77,6 +77,7 @@ def doctor() -> None:
     click.echo(f"  DB path:        {config.db_path}")
     click.echo(f"  DB exists:      {config.db_path.exists()}")
     click.echo(f"  Vector backend: {config.vector_backend}")
+    click.echo(f"  Vector dtype:   {config.vector_dtype}")
     click.echo(f"  Embedding model: {config.embedding_model}")
     click.echo(f"  Chunk size:     {config.chunk_size}")
     click.echo(f"  Chunk overlap:  {config.chunk_overlap}")
@@ -121,7 +122,7 @@ def doctor() -> None:
         click.echo("\nDatabase stats:")
         from fizban.db import Database
 
-        db = Database(config)
+        db = Database.read_only(config)
         try:
             stats = db.stats()
             click.echo(f"  Documents: {stats['documents']}")
@@ -20,11 +20,20 @@ class Config:
     vector_backend: str = field(
         default_factory=lambda: os.environ.get("FIZBAN_VECTOR_BACKEND", "vec")
     )
+    # Element type of stored vectors: "float32" or "int8" (sqlite-vec only).
+    # Changing it requires a full rebuild of the index.
+    vector_dtype: str = field(
+        default_factory=lambda: os.environ.get("FIZBAN_VECTOR_DTYPE", "float32")
+    )
     embedding_model: str = field(
         default_factory=lambda: os.environ.get(
             "FIZBAN_EMBEDDING_MODEL", "all-MiniLM-L6-v2"
         )
     )
+    # Texts per forward pass when encoding; larger batches suit GPUs
+    encode_batch_size: int = field(
+        default_factory=lambda: int(os.environ.get("FIZBAN_ENCODE_BATCH_SIZE", "64"))
+    )
     chunk_size: int = field(
         default_factory=lambda: int(os.environ.get("FIZBAN_CHUNK_SIZE", "1000"))
     )
@@ -46,6 +55,20 @@ class Config:
         ]
     )
 
+    def repo_for_path(self, path: str) -> str | None:
+        """Return the configured repo containing path, or None.
+
+        The path is normalized first so ".." segments cannot climb out of a
+        repo, and repos match whole directories only ("/docs" does not
+        contain "/docs-old/a.md").
+        """
+        path = os.path.normpath(path)
+        for repo in self.repos:
+            root = os.path.normpath(repo)
+            if path == root or path.startswith(os.path.join(root, "")):
+                return repo
+        return None
+
     def ensure_db_dir(self) -> None:
         """Create the database directory if it doesn't exist."""
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
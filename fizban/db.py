@@ -3,15 +3,19 @@
 import hashlib
 import logging
 import sqlite3
+import threading
 import time
-from dataclasses import dataclass
+import weakref
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
 
 from fizban.config import Config, get_config
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class DocumentRecord:
     """A document stored in the database."""
 
@@ -25,7 +29,7 @@ class DocumentRecord:
     indexed_at: float
 
 
-@dataclass
+@dataclass(slots=True)
 class ChunkRecord:
     """A text chunk stored in the database."""
 
@@ -37,7 +41,7 @@ class ChunkRecord:
     end_char: int
 
 
-@dataclass
+@dataclass(slots=True)
 class ImageRecord:
     """An image reference stored in the database."""
 
@@ -48,6 +52,19 @@ class ImageRecord:
     alt_text: str
 
 
+@dataclass(slots=True)
+class ChunkHitRecord:
+    """A chunk joined with the document fields shown for a search hit."""
+
+    id: int
+    document_id: int
+    chunk_index: int
+    content: str
+    document_path: str
+    document_title: str
+    repo: str
+
+
 SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS documents (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -57,7 +74,8 @@ CREATE TABLE IF NOT EXISTS documents (
     content TEXT NOT NULL,
     content_hash TEXT NOT NULL,
     last_modified REAL NOT NULL,
-    indexed_at REAL NOT NULL
+    indexed_at REAL NOT NULL,
+    size INTEGER
 );
 
 CREATE TABLE IF NOT EXISTS chunks (
@@ -66,7 +84,8 @@ CREATE TABLE IF NOT EXISTS chunks (
     chunk_index INTEGER NOT NULL,
     content TEXT NOT NULL,
     start_char INTEGER NOT NULL,
-    end_char INTEGER NOT NULL
+    end_char INTEGER NOT NULL,
+    chunk_hash TEXT
 );
 
 CREATE TABLE IF NOT EXISTS images (
@@ -77,16 +96,70 @@ CREATE TABLE IF NOT EXISTS images (
     alt_text TEXT DEFAULT ''
 );
 
-CREATE INDEX IF NOT EXISTS idx_chunks_document ON chunks(document_id);
 CREATE INDEX IF NOT EXISTS idx_images_document ON images(document_id);
-CREATE INDEX IF NOT EXISTS idx_documents_repo ON documents(repo);
-CREATE INDEX IF NOT EXISTS idx_documents_hash ON documents(content_hash);
 """
 
+# Applied after migrations, since it references columns they may add.
+# The covering index answers the per-repo path/stat/hash scan of
+# incremental updates from the index alone; it supersedes the plain repo
+# index, and nothing looks documents up by hash. The chunk index returns a
+# document's chunks already in chunk_index order, so reads skip the sort;
+# it supersedes the plain document_id index.
+INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_documents_repo_state
+    ON documents(repo, path, last_modified, size, content_hash);
+DROP INDEX IF EXISTS idx_documents_repo;
+DROP INDEX IF EXISTS idx_documents_hash;
+CREATE INDEX IF NOT EXISTS idx_chunks_document_index
+    ON chunks(document_id, chunk_index);
+DROP INDEX IF EXISTS idx_chunks_document;
+"""
+
+# Explicit column lists in record field order, so rows map positionally.
+# Connections keep the default tuple rows: records are built with
+# Record(*row), and sqlite3.Row would only add per-row overhead. Document
+# reads leave out size: read-only connections cannot migrate a database
+# created before that column, and stat state is read via get_file_states().
+DOCUMENT_COLUMNS = (
+    "id, repo, path, title, content, content_hash, last_modified, indexed_at"
+)
+CHUNK_COLUMNS = "id, document_id, chunk_index, content, start_char, end_char"
+IMAGE_COLUMNS = "id, document_id, original_path, absolute_path, alt_text"
+CHUNK_DOCUMENT_COLUMNS = ", ".join(
+    [f"c.{col}" for col in CHUNK_COLUMNS.split(", ")]
+    + [f"d.{col}" for col in DOCUMENT_COLUMNS.split(", ")]
+)
+CHUNK_HIT_COLUMNS = (
+    "c.id, c.document_id, c.chunk_index, c.content, d.path, d.title, d.repo"
+)
+
+
+def content_hash(content: str | bytes) -> str:
+    """Compute a SHA-256 hash of content for change detection.
+
+    Accepts raw bytes so file contents can be hashed without a
+    decode/encode round trip; str is hashed as its UTF-8 encoding.
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+def _close_connection(conn: sqlite3.Connection) -> None:
+    """Commit any pending bare writes on a connection, then close it."""
+    if conn.in_transaction:
+        conn.commit()
+    conn.close()
+
 
-def content_hash(content: str) -> str:
-    """Compute a SHA-256 hash of content for change detection."""
-    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+class _ThreadConnection:
+    """One thread's connection, closed once the thread's locals are freed."""
+
+    __slots__ = ("__weakref__", "close", "conn")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.close = weakref.finalize(self, _close_connection, conn)
 
 
 class Database:
@@ -94,84 +167,215 @@ class Database:
 
     def __init__(self, config: Config | None = None):
         self.config = config or get_config()
-        self._conn: sqlite3.Connection | None = None
+        self._read_only = False
+        # One connection per thread; WAL lets readers run alongside the writer.
+        # The set only holds weak references, so a connection is closed when
+        # its thread exits rather than living until close().
+        self._local = threading.local()
+        self._connections: weakref.WeakSet[_ThreadConnection] = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+
+    @classmethod
+    def read_only(cls, config: Config | None = None) -> "Database":
+        """Create a Database that opens its connections read-only.
+
+        Skips directory creation and the connection pragmas, for callers
+        that only query (health checks, document fetches).
+        """
+        db = cls(config)
+        db._read_only = True
+        return db
+
+    @property
+    def _conn(self) -> sqlite3.Connection | None:
+        """The current thread's connection, if one has been opened."""
+        holder = getattr(self._local, "holder", None)
+        return holder.conn if holder is not None else None
 
     @property
     def conn(self) -> sqlite3.Connection:
-        """Get or create the database connection."""
-        if self._conn is None:
-            self.config.ensure_db_dir()
-            self._conn = sqlite3.connect(str(self.config.db_path))
-            self._conn.execute("PRAGMA journal_mode=WAL")
-            self._conn.execute("PRAGMA foreign_keys=ON")
-            self._conn.row_factory = sqlite3.Row
-        return self._conn
+        """Get or create the database connection for the current thread."""
+        conn = self._conn
+        if conn is None:
+            if self._read_only:
+                uri = self.config.db_path.resolve().as_uri() + "?mode=ro"
+                conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            else:
+                self.config.ensure_db_dir()
+                conn = sqlite3.connect(
+                    str(self.config.db_path), check_same_thread=False
+                )
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA foreign_keys=ON")
+                conn.execute("PRAGMA busy_timeout=5000")
+                # WAL is crash-safe with NORMAL sync; only checkpoints fsync
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("PRAGMA temp_store=MEMORY")
+                conn.execute("PRAGMA cache_size=-65536")
+                # Read pages through a memory map instead of read() copies
+                conn.execute("PRAGMA mmap_size=268435456")
+            holder = self._local.holder = _ThreadConnection(conn)
+            with self._connections_lock:
+                self._connections.add(holder)
+        return conn
 
     def init_db(self) -> None:
         """Initialize the database schema."""
         self.conn.executescript(SCHEMA_SQL)
+        self._migrate()
+        self.conn.executescript(INDEX_SQL)
         logger.info("Database initialized at %s", self.config.db_path)
 
+    def _migrate(self) -> None:
+        """Add columns introduced after a database was first created."""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(documents)")}
+        if "size" not in columns:
+            self.conn.execute("ALTER TABLE documents ADD COLUMN size INTEGER")
+            self.conn.commit()
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(chunks)")}
+        if "chunk_hash" not in columns:
+            self.conn.execute("ALTER TABLE chunks ADD COLUMN chunk_hash TEXT")
+            self.conn.commit()
+
+    def begin(self) -> None:
+        """Start a write transaction, taking the write lock immediately.
+
+        Writes made outside a transaction leave an implicit one open; they
+        are committed first rather than failing the BEGIN.
+        """
+        if self.conn.in_transaction:
+            self.conn.commit()
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def commit(self) -> None:
+        """Commit the current transaction."""
+        self.conn.commit()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group writes into a single transaction.
+
+        Write methods do not commit on their own; wrap them in this context
+        manager (or call commit()) to persist them. Bare writes still pending
+        are committed when the next transaction starts or on close(). Rolls
+        back on exception.
+        Transactions from different threads are serialized by a write lock.
+        A transaction nested in another on the same thread runs as a
+        savepoint, so its writes are undone on its own exception and
+        committed with the outermost transaction.
+        """
+        with self._write_lock:
+            depth = getattr(self._local, "depth", 0)
+            savepoint = f"nested_{depth}"
+            if depth:
+                self.conn.execute(f"SAVEPOINT {savepoint}")
+            else:
+                self.begin()
+            self._local.depth = depth + 1
+            try:
+                yield
+            except BaseException:
+                if depth:
+                    self.conn.execute(f"ROLLBACK TO {savepoint}")
+                    self.conn.execute(f"RELEASE {savepoint}")
+                else:
+                    self.conn.rollback()
+                raise
+            finally:
+                self._local.depth = depth
+            if depth:
+                self.conn.execute(f"RELEASE {savepoint}")
+            else:
+                self.commit()
+
     def close(self) -> None:
-        """Close the database connection."""
-        if self._conn is not None:
-            self._conn.close()
-            self._conn = None
+        """Close the database connections of all threads."""
+        with self._connections_lock:
+            holders = list(self._connections)
+            if holders and not self._read_only:
+                # Let SQLite refresh any planner statistics that went stale
+                try:
+                    holders[0].conn.execute("PRAGMA optimize")
+                except sqlite3.Error:
+                    logger.debug("PRAGMA optimize failed", exc_info=True)
+            for holder in holders:
+                holder.close()
+            self._connections.clear()
+            self._local = threading.local()
 
     # --- Document operations ---
 
     def upsert_document(
-        self, repo: str, path: str, title: str, content: str, last_modified: float
+        self,
+        repo: str,
+        path: str,
+        title: str,
+        content: str,
+        last_modified: float,
+        size: int | None = None,
+        hash_val: str | None = None,
     ) -> int:
-        """Insert or update a document. Returns the document ID."""
-        hash_val = content_hash(content)
+        """Insert or update a document. Returns the document ID.
+
+        size is the file size in bytes, stored with last_modified so that
+        unchanged files can be skipped without reading them. hash_val is
+        the hash of the raw file bytes; it defaults to the hash of content.
+        """
+        if hash_val is None:
+            hash_val = content_hash(content)
         now = time.time()
         cursor = self.conn.execute(
-            """INSERT INTO documents (repo, path, title, content, content_hash, last_modified, indexed_at)
-               VALUES (?, ?, ?, ?, ?, ?, ?)
+            """INSERT INTO documents (repo, path, title, content, content_hash, last_modified, indexed_at, size)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                ON CONFLICT(path) DO UPDATE SET
                    repo=excluded.repo, title=excluded.title, content=excluded.content,
                    content_hash=excluded.content_hash, last_modified=excluded.last_modified,
-                   indexed_at=excluded.indexed_at
+                   indexed_at=excluded.indexed_at, size=excluded.size
                RETURNING id""",
-            (repo, path, title, content, hash_val, last_modified, now),
+            (repo, path, title, content, hash_val, last_modified, now, size),
         )
         row = cursor.fetchone()
-        self.conn.commit()
         return row[0]
 
     def get_document(self, doc_id: int) -> DocumentRecord | None:
         """Fetch a document by ID."""
         row = self.conn.execute(
-            "SELECT * FROM documents WHERE id = ?", (doc_id,)
+            f"SELECT {DOCUMENT_COLUMNS} FROM documents WHERE id = ?", (doc_id,)
         ).fetchone()
         if row is None:
             return None
-        return DocumentRecord(**dict(row))
+        return DocumentRecord(*row)
 
     def get_document_by_path(self, path: str) -> DocumentRecord | None:
         """Fetch a document by file path."""
         row = self.conn.execute(
-            "SELECT * FROM documents WHERE path = ?", (path,)
+            f"SELECT {DOCUMENT_COLUMNS} FROM documents WHERE path = ?", (path,)
         ).fetchone()
         if row is None:
             return None
-        return DocumentRecord(**dict(row))
+        return DocumentRecord(*row)
 
     def list_documents(self, repo: str | None = None) -> list[DocumentRecord]:
         """List all documents, optionally filtered by repo."""
         if repo:
             rows = self.conn.execute(
-                "SELECT * FROM documents WHERE repo = ? ORDER BY path", (repo,)
+                f"SELECT {DOCUMENT_COLUMNS} FROM documents WHERE repo = ? ORDER BY path",
+                (repo,),
             ).fetchall()
         else:
-            rows = self.conn.execute("SELECT * FROM documents ORDER BY path").fetchall()
-        return [DocumentRecord(**dict(r)) for r in rows]
+            rows = self.conn.execute(
+                f"SELECT {DOCUMENT_COLUMNS} FROM documents ORDER BY path"
+            ).fetchall()
+        return [DocumentRecord(*r) for r in rows]
 
     def delete_document(self, doc_id: int) -> None:
         """Delete a document and its chunks/images (cascade)."""
         self.conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
-        self.conn.commit()
+
+    def clear_documents(self) -> None:
+        """Delete all documents and their chunks/images (cascade)."""
+        self.conn.execute("DELETE FROM documents")
 
     def get_content_hash(self, path: str) -> str | None:
         """Get the content hash for a document by path."""
@@ -180,15 +384,31 @@ class Database:
         ).fetchone()
         return row[0] if row else None
 
+    def get_file_states(self, repo: str) -> dict[str, tuple[float, int | None, str]]:
+        """Map each document path in a repo to (last_modified, size, content_hash)."""
+        rows = self.conn.execute(
+            "SELECT path, last_modified, size, content_hash FROM documents WHERE repo = ?",
+            (repo,),
+        ).fetchall()
+        return {r[0]: (r[1], r[2], r[3]) for r in rows}
+
+    def update_file_stat(self, path: str, last_modified: float, size: int) -> None:
+        """Record a new mtime/size for a document whose content is unchanged."""
+        self.conn.execute(
+            "UPDATE documents SET last_modified = ?, size = ? WHERE path = ?",
+            (last_modified, size, path),
+        )
+
     def get_all_paths(self, repo: str | None = None) -> set[str]:
         """Get all indexed document paths."""
+        # Iterate the cursor directly so no intermediate list of rows is built
         if repo:
-            rows = self.conn.execute(
+            cursor = self.conn.execute(
                 "SELECT path FROM documents WHERE repo = ?", (repo,)
-            ).fetchall()
+            )
         else:
-            rows = self.conn.execute("SELECT path FROM documents").fetchall()
-        return {r[0] for r in rows}
+            cursor = self.conn.execute("SELECT path FROM documents")
+        return {r[0] for r in cursor}
 
     # --- Chunk operations ---
 
@@ -199,32 +419,129 @@ class Database:
         Returns list of chunk IDs."""
         # Delete existing chunks for this document first
         self.conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
-        chunk_ids = []
+        return self._insert_chunk_rows(document_id, chunks)
+
+    def sync_chunks(
+        self, document_id: int, chunks: list[tuple[int, str, int, int]]
+    ) -> tuple[list[int], set[int], list[int]]:
+        """Replace a document's chunks, keeping rows whose content is unchanged.
+
+        Each tuple: (chunk_index, content, start_char, end_char). Existing
+        chunks with identical content keep their ID (and so their vector);
+        only their position is updated.
+
+        Returns (chunk_ids, reused_ids, removed_ids): the IDs for the given
+        chunks in order, the subset carried over from existing rows, and the
+        IDs of old chunks that were deleted.
+        """
+        by_hash: dict[str, list[int]] = {}
+        for chunk_id, chunk_hash in self.conn.execute(
+            "SELECT id, chunk_hash FROM chunks WHERE document_id = ? ORDER BY id",
+            (document_id,),
+        ):
+            by_hash.setdefault(chunk_hash, []).append(chunk_id)
+
+        chunk_ids: list[int | None] = []
+        moved = []
+        new_positions = []
+        new_chunks = []
         for chunk_index, content, start_char, end_char in chunks:
-            cursor = self.conn.execute(
-                "INSERT INTO chunks (document_id, chunk_index, content, start_char, end_char) VALUES (?, ?, ?, ?, ?) RETURNING id",
-                (document_id, chunk_index, content, start_char, end_char),
-            )
-            chunk_ids.append(cursor.fetchone()[0])
-        self.conn.commit()
-        return chunk_ids
+            matches = by_hash.get(content_hash(content))
+            if matches:
+                chunk_id = matches.pop(0)
+                moved.append((chunk_index, start_char, end_char, chunk_id))
+                chunk_ids.append(chunk_id)
+            else:
+                new_positions.append(len(chunk_ids))
+                new_chunks.append((chunk_index, content, start_char, end_char))
+                chunk_ids.append(None)
+
+        removed_ids = [cid for ids in by_hash.values() for cid in ids]
+        self.conn.executemany(
+            "DELETE FROM chunks WHERE id = ?", [(cid,) for cid in removed_ids]
+        )
+        self.conn.executemany(
+            "UPDATE chunks SET chunk_index = ?, start_char = ?, end_char = ? WHERE id = ?",
+            moved,
+        )
+        for pos, chunk_id in zip(
+            new_positions, self._insert_chunk_rows(document_id, new_chunks)
+        ):
+            chunk_ids[pos] = chunk_id
+        return chunk_ids, {m[3] for m in moved}, removed_ids
+
+    def _insert_chunk_rows(
+        self, document_id: int, chunks: list[tuple[int, str, int, int]]
+    ) -> list[int]:
+        """Insert chunk rows (with content hashes) and return their IDs."""
+        if not chunks:
+            return []
+        self.conn.executemany(
+            "INSERT INTO chunks (document_id, chunk_index, content, start_char, end_char, chunk_hash) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (document_id, chunk_index, content, start, end, content_hash(content))
+                for chunk_index, content, start, end in chunks
+            ],
+        )
+        # executemany leaves cursor.lastrowid unset, so ask SQLite directly.
+        # The rows are inserted under one write lock, so AUTOINCREMENT
+        # assigns them consecutive IDs ending at the last inserted rowid.
+        last = self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        first = last - len(chunks) + 1
+        return list(range(first, last + 1))
 
     def get_chunks(self, document_id: int) -> list[ChunkRecord]:
         """Get all chunks for a document."""
         rows = self.conn.execute(
-            "SELECT * FROM chunks WHERE document_id = ? ORDER BY chunk_index",
+            f"SELECT {CHUNK_COLUMNS} FROM chunks WHERE document_id = ? ORDER BY chunk_index",
             (document_id,),
         ).fetchall()
-        return [ChunkRecord(**dict(r)) for r in rows]
+        return [ChunkRecord(*r) for r in rows]
 
     def get_chunk(self, chunk_id: int) -> ChunkRecord | None:
         """Get a single chunk by ID."""
         row = self.conn.execute(
-            "SELECT * FROM chunks WHERE id = ?", (chunk_id,)
+            f"SELECT {CHUNK_COLUMNS} FROM chunks WHERE id = ?", (chunk_id,)
         ).fetchone()
         if row is None:
             return None
-        return ChunkRecord(**dict(row))
+        return ChunkRecord(*row)
+
+    def get_chunk_with_document(
+        self, chunk_id: int
+    ) -> tuple[ChunkRecord, DocumentRecord] | None:
+        """Get a chunk and its document in a single query."""
+        row = self.conn.execute(
+            f"""SELECT {CHUNK_DOCUMENT_COLUMNS}
+               FROM chunks c JOIN documents d ON d.id = c.document_id
+               WHERE c.id = ?""",
+            (chunk_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        split = len(fields(ChunkRecord))
+        return ChunkRecord(*row[:split]), DocumentRecord(*row[split:])
+
+    def get_chunk_hits(self, chunk_ids: list[int]) -> dict[int, ChunkHitRecord]:
+        """Get chunks with their document fields in a single query.
+
+        Args:
+            chunk_ids: Chunk IDs, e.g. from a vector search.
+
+        Returns:
+            Dict mapping chunk ID to ChunkHitRecord. IDs with no chunk (or
+            no document) are absent.
+        """
+        if not chunk_ids:
+            return {}
+        placeholders = ",".join("?" for _ in chunk_ids)
+        rows = self.conn.execute(
+            f"""SELECT {CHUNK_HIT_COLUMNS}
+               FROM chunks c JOIN documents d ON d.id = c.document_id
+               WHERE c.id IN ({placeholders})""",
+            chunk_ids,
+        ).fetchall()
+        return {row[0]: ChunkHitRecord(*row) for row in rows}
 
     # --- Image operations ---
 
@@ -233,27 +550,28 @@ class Database:
     ) -> None:
         """Insert image references for a document. Each tuple: (original_path, absolute_path, alt_text)."""
         self.conn.execute("DELETE FROM images WHERE document_id = ?", (document_id,))
-        for original_path, absolute_path, alt_text in images:
-            self.conn.execute(
-                "INSERT INTO images (document_id, original_path, absolute_path, alt_text) VALUES (?, ?, ?, ?)",
-                (document_id, original_path, absolute_path, alt_text),
-            )
-        self.conn.commit()
+        self.conn.executemany(
+            "INSERT INTO images (document_id, original_path, absolute_path, alt_text) VALUES (?, ?, ?, ?)",
+            [(document_id, *image) for image in images],
+        )
 
     def get_images(self, document_id: int) -> list[ImageRecord]:
         """Get all image references for a document."""
         rows = self.conn.execute(
-            "SELECT * FROM images WHERE document_id = ? ORDER BY id", (document_id,)
+            f"SELECT {IMAGE_COLUMNS} FROM images WHERE document_id = ? ORDER BY id",
+            (document_id,),
         ).fetchall()
-        return [ImageRecord(**dict(r)) for r in rows]
+        return [ImageRecord(*r) for r in rows]
 
     # --- Stats ---
 
     def stats(self) -> dict:
         """Get database statistics."""
-        doc_count = self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
-        chunk_count = self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
-        image_count = self.conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+        doc_count, chunk_count, image_count = self.conn.execute(
+            """SELECT (SELECT COUNT(*) FROM documents),
+                      (SELECT COUNT(*) FROM chunks),
+                      (SELECT COUNT(*) FROM images)"""
+        ).fetchone()
         repos = self.conn.execute("SELECT DISTINCT repo FROM documents").fetchall()
         return {
             "documents": doc_count,
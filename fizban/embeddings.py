@@ -1,11 +1,21 @@
 """Embedding generation using sentence-transformers."""
 
 import logging
-import numpy as np
+import threading
+from typing import TYPE_CHECKING
+
 from fizban.config import Config, get_config
 
+if TYPE_CHECKING:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+
 logger = logging.getLogger(__name__)
 
+# Loaded SentenceTransformer models, keyed by model name
+_MODEL_CACHE: dict[str, "SentenceTransformer"] = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
 
 class EmbeddingModel:
     """Wrapper around sentence-transformers for generating embeddings.
@@ -31,24 +41,32 @@ class EmbeddingModel:
         return self._ensure_model().get_sentence_embedding_dimension()
 
     def _ensure_model(self):
-        """Load the model if not already loaded."""
+        """Load the model if not already loaded.
+
+        Loaded models are shared through a process-wide cache, so repeated
+        index runs in a long-lived process (e.g. the MCP server) load each
+        model only once.
+        """
         if self._model is None:
-            logger.info("Loading embedding model: %s", self.config.embedding_model)
-            from sentence_transformers import SentenceTransformer
-
-            # Explicitly disable trust_remote_code to prevent model repos from
-            # executing arbitrary Python code during loading.
-            self._model = SentenceTransformer(
-                self.config.embedding_model,
-                trust_remote_code=False,
-            )
-            logger.info(
-                "Model loaded (dimension=%d)",
-                self._model.get_sentence_embedding_dimension(),
-            )
+            name = self.config.embedding_model
+            with _MODEL_CACHE_LOCK:
+                model = _MODEL_CACHE.get(name)
+                if model is None:
+                    logger.info("Loading embedding model: %s", name)
+                    from sentence_transformers import SentenceTransformer
+
+                    # Explicitly disable trust_remote_code to prevent model repos
+                    # from executing arbitrary Python code during loading.
+                    model = SentenceTransformer(name, trust_remote_code=False)
+                    logger.info(
+                        "Model loaded (dimension=%d)",
+                        model.get_sentence_embedding_dimension(),
+                    )
+                    _MODEL_CACHE[name] = model
+            self._model = model
         return self._model
 
-    def encode(self, texts: list[str]) -> np.ndarray:
+    def encode(self, texts: list[str]) -> "np.ndarray":
         """Encode a list of texts into embeddings.
 
         Args:
@@ -58,12 +76,20 @@ class EmbeddingModel:
             numpy array of shape (len(texts), dimension).
         """
         if not texts:
+            # numpy is imported on demand to keep CLI startup light
+            import numpy as np
+
             return np.array([]).reshape(0, self.dimension)
         model = self._ensure_model()
-        embeddings = model.encode(texts, show_progress_bar=False, convert_to_numpy=True)
+        embeddings = model.encode(
+            texts,
+            batch_size=self.config.encode_batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+        )
         return embeddings
 
-    def encode_query(self, query: str) -> np.ndarray:
+    def encode_query(self, query: str) -> "np.ndarray":
         """Encode a single query text.
 
         Args:
@@ -1,23 +1,59 @@
 """Document indexing with incremental update support."""
 
 import logging
+import os
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
 
+import numpy as np
+
 from fizban.config import Config, get_config
 from fizban.db import Database, content_hash
 from fizban.embeddings import EmbeddingModel
-from fizban.markdown_parser import parse_markdown
-from fizban.repos import scan_repo
+from fizban.markdown_parser import ParsedDocument, _parse_markdown
+from fizban.repos import iter_repo_files
 from fizban.vector import get_vector_backend
 from fizban.vector.base import VectorBackend
 
 logger = logging.getLogger(__name__)
 
+# Number of files written per DB transaction and encoded per encode() call
+EMBED_BATCH_FILES = 32
 
-def chunk_text(
+# Worker threads reading and parsing files ahead of the DB/embedding stage
+READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Files read and parsed ahead of the DB/embedding stage; bounds how many
+# parsed documents are held in memory at once
+READ_AHEAD_FILES = 2 * EMBED_BATCH_FILES
+
+
+# Sentence separators, in the order they are preferred as chunk boundaries
+_SENTENCE_SEPARATORS = (". ", ".\n", "! ", "? ")
+
+
+def _rfind_break(text: str, start: int, end: int, chunk_size: int) -> int:
+    """Pick a chunk end in text[start:end] by scanning for separators."""
+    # Look for paragraph break
+    newline_pos = text.rfind("\n\n", start, end)
+    if newline_pos > start + chunk_size // 2:
+        return newline_pos + 2
+    # Look for sentence break
+    for sep in _SENTENCE_SEPARATORS:
+        sep_pos = text.rfind(sep, start, end)
+        if sep_pos > start + chunk_size // 2:
+            return sep_pos + len(sep)
+    return end
+
+
+def chunk_spans(
     text: str, chunk_size: int = 1000, chunk_overlap: int = 200
-) -> list[tuple[str, int, int]]:
-    """Split text into overlapping chunks.
+) -> list[tuple[int, int]]:
+    """Compute overlapping chunk boundaries without slicing the text.
 
     Args:
         text: Text to split.
@@ -25,33 +61,23 @@ def chunk_text(
         chunk_overlap: Overlap between consecutive chunks.
 
     Returns:
-        List of (chunk_content, start_char, end_char) tuples.
+        List of (start_char, end_char) offsets into text.
     """
     if not text:
         return []
     if len(text) <= chunk_size:
-        return [(text, 0, len(text))]
+        return [(0, len(text))]
 
-    chunks = []
+    spans = []
     start = 0
     while start < len(text):
         end = min(start + chunk_size, len(text))
 
         # Try to break at paragraph or sentence boundary
         if end < len(text):
-            # Look for paragraph break
-            newline_pos = text.rfind("\n\n", start, end)
-            if newline_pos > start + chunk_size // 2:
-                end = newline_pos + 2
-            else:
-                # Look for sentence break
-                for sep in (". ", ".\n", "! ", "? "):
-                    sep_pos = text.rfind(sep, start, end)
-                    if sep_pos > start + chunk_size // 2:
-                        end = sep_pos + len(sep)
-                        break
-
-        chunks.append((text[start:end], start, end))
+            end = _rfind_break(text, start, end, chunk_size)
+
+        spans.append((start, end))
 
         # Move start forward, accounting for overlap
         new_start = end - chunk_overlap
@@ -64,12 +90,32 @@ def chunk_text(
         # Don't create tiny trailing chunks - append remainder to last chunk
         if len(text) - start < chunk_overlap:
             # Extend the last chunk to include the remaining text
-            if chunks:
-                last_content, last_start, last_end = chunks[-1]
-                chunks[-1] = (text[last_start:], last_start, len(text))
+            spans[-1] = (spans[-1][0], len(text))
             break
 
-    return chunks
+    return spans
+
+
+def chunk_text(
+    text: str, chunk_size: int = 1000, chunk_overlap: int = 200
+) -> list[tuple[str, int, int]]:
+    """Split text into overlapping chunks.
+
+    Boundaries are computed first, so each chunk's text is sliced exactly
+    once.
+
+    Args:
+        text: Text to split.
+        chunk_size: Maximum characters per chunk.
+        chunk_overlap: Overlap between consecutive chunks.
+
+    Returns:
+        List of (chunk_content, start_char, end_char) tuples.
+    """
+    return [
+        (text[start:end], start, end)
+        for start, end in chunk_spans(text, chunk_size, chunk_overlap)
+    ]
 
 
 def _identify_repo(file_path: Path, repos: list[str]) -> str:
@@ -81,61 +127,130 @@ def _identify_repo(file_path: Path, repos: list[str]) -> str:
     return str(file_path.parent)
 
 
-def _index_file(
+@dataclass
+class PreparedFile:
+    """DB rows written for a new or changed file, awaiting embedding.
+
+    chunk_ids and texts cover only chunks whose content is new; unchanged
+    chunks keep their existing vectors.
+    """
+
+    doc_id: int
+    chunk_ids: list[int]
+    texts: list[str]
+    image_count: int
+    stale_chunk_ids: list[int]
+
+
+@dataclass
+class FileRead:
+    """A markdown file that was read because its stat differs from the index.
+
+    parsed is None when the content hash still matches the indexed version.
+    """
+
+    path: Path
+    mtime: float
+    size: int
+    content_hash: str
+    parsed: ParsedDocument | None
+
+
+def _read_and_parse(
     file_path: Path,
-    repo: str,
-    db: Database,
-    vector: VectorBackend,
-    embeddings: EmbeddingModel,
-    config: Config,
-) -> bool:
-    """Index a single markdown file.
+    repo_root: Path,
+    known: dict[str, tuple[float, int | None, str]],
+) -> FileRead | None:
+    """Read, hash and parse a file unless it matches its indexed state.
+
+    Touches no database state so it can run in a worker thread; known maps
+    path to the indexed (last_modified, size, content_hash).
 
-    Returns True if the file was indexed (new or changed), False if skipped.
+    Returns None if the file is unchanged or unreadable.
     """
     path_str = str(file_path)
+    indexed = known.get(path_str)
+
+    # Skip without reading if mtime and size match the indexed version
+    try:
+        st = file_path.stat()
+    except OSError as e:
+        logger.error("Failed to stat %s: %s", file_path, e)
+        return None
+    if indexed is not None and indexed[:2] == (st.st_mtime, st.st_size):
+        return None
 
     # Read file
     try:
-        raw_content = file_path.read_text(encoding="utf-8")
-    except Exception as e:
+        raw_bytes = file_path.read_bytes()
+    except OSError as e:
         logger.error("Failed to read %s: %s", file_path, e)
-        return False
+        return None
+
+    # Check if content has changed (hash the bytes; decode only if it has)
+    new_hash = content_hash(raw_bytes)
+    if indexed is not None and indexed[2] == new_hash:
+        return FileRead(file_path, st.st_mtime, st.st_size, new_hash, parsed=None)
 
-    # Check if content has changed
-    new_hash = content_hash(raw_content)
-    existing_hash = db.get_content_hash(path_str)
-    if existing_hash == new_hash:
-        return False
+    try:
+        raw_content = raw_bytes.decode("utf-8")
+    except UnicodeDecodeError as e:
+        logger.error("Failed to read %s: %s", file_path, e)
+        return None
+    # Same newline translation as text-mode reads
+    raw_content = raw_content.replace("\r\n", "\n").replace("\r", "\n")
 
     # Parse markdown (pass repo root to sandbox image path resolution)
-    parsed = parse_markdown(raw_content, file_path, repo_root=Path(repo))
+    parsed = _parse_markdown(raw_content, file_path, repo_root)
+    return FileRead(file_path, st.st_mtime, st.st_size, new_hash, parsed=parsed)
+
+
+def _prepare_file(
+    file_read: FileRead,
+    repo: str,
+    db: Database,
+    config: Config,
+) -> PreparedFile | None:
+    """Store a changed file's document, chunk and image rows.
+
+    Embedding and vector writes are left to the caller so that chunk texts
+    from many files can be encoded together in one batch, outside the DB
+    transaction.
+
+    Returns the prepared file if its content changed, None otherwise.
+    """
+    path_str = str(file_read.path)
+    parsed = file_read.parsed
+    if parsed is None:
+        # Touched but unchanged: remember the new stat for next time
+        db.update_file_stat(path_str, file_read.mtime, file_read.size)
+        return None
 
     # Upsert document
-    last_modified = file_path.stat().st_mtime
     doc_id = db.upsert_document(
-        repo, path_str, parsed.title, parsed.content, last_modified
+        repo,
+        path_str,
+        parsed.title,
+        parsed.content,
+        file_read.mtime,
+        file_read.size,
+        file_read.content_hash,
     )
 
-    # Delete old vectors for this document's chunks
-    old_chunks = db.get_chunks(doc_id)
-    if old_chunks:
-        vector.delete_vectors([c.id for c in old_chunks])
-
     # Chunk text
     text_chunks = chunk_text(parsed.content, config.chunk_size, config.chunk_overlap)
     chunk_data = [
         (i, content, start, end) for i, (content, start, end) in enumerate(text_chunks)
     ]
 
-    # Insert chunks into DB
-    chunk_ids = db.insert_chunks(doc_id, chunk_data)
-
-    # Generate and store embeddings
-    if chunk_ids:
-        texts = [content for _, content, _, _ in chunk_data]
-        vectors = embeddings.encode(texts)
-        vector.add_vectors(chunk_ids, vectors)
+    # Store chunks, keeping unchanged ones (and their vectors) in place
+    all_ids, reused_ids, stale_chunk_ids = db.sync_chunks(doc_id, chunk_data)
+    chunk_ids = []
+    texts = []
+    for chunk_id, (_, content, _, _) in zip(all_ids, chunk_data):
+        if chunk_id not in reused_ids:
+            chunk_ids.append(chunk_id)
+            texts.append(content)
 
     # Store image references
     image_data = [
@@ -144,9 +259,105 @@ def _index_file(
     db.insert_images(doc_id, image_data)
 
     logger.info(
-        "Indexed %s (%d chunks, %d images)", path_str, len(chunk_ids), len(image_data)
+        "Indexed %s (%d chunks, %d new, %d images)",
+        path_str,
+        len(all_ids),
+        len(chunk_ids),
+        len(image_data),
     )
-    return True
+    return PreparedFile(
+        doc_id=doc_id,
+        chunk_ids=chunk_ids,
+        texts=texts,
+        image_count=len(image_data),
+        stale_chunk_ids=stale_chunk_ids,
+    )
+
+
+def _embed_pending(
+    pending: list[PreparedFile],
+    vector: VectorBackend,
+    embeddings: EmbeddingModel,
+) -> None:
+    """Replace the vectors of several prepared files using one encode() call."""
+    stale_ids = [cid for p in pending for cid in p.stale_chunk_ids]
+    if stale_ids:
+        vector.delete_vectors(stale_ids)
+    all_texts = [text for p in pending for text in p.texts]
+    if not all_texts:
+        return
+    vectors = embeddings.encode(all_texts)
+    offsets = np.cumsum([len(p.chunk_ids) for p in pending])[:-1]
+    for prepared, file_vectors in zip(pending, np.split(vectors, offsets)):
+        if prepared.chunk_ids:
+            vector.add_vectors(prepared.chunk_ids, file_vectors)
+
+
+def _read_ahead(
+    pool: ThreadPoolExecutor, fn: Callable, items: Iterable, limit: int
+) -> Iterator:
+    """Like pool.map, but with at most limit calls submitted ahead.
+
+    pool.map submits every item up front, which would consume a streamed
+    file listing immediately and hold every result until it is used.
+    """
+    pending: deque[Future] = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= limit:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _record(files: Iterable[Path], seen: list[Path]) -> Iterator[Path]:
+    """Pass files through, appending each one to seen as it is consumed."""
+    for path in files:
+        seen.append(path)
+        yield path
+
+
+def _index_files(
+    md_files: Iterable[Path],
+    repo: str,
+    db: Database,
+    vector: VectorBackend,
+    embeddings: EmbeddingModel,
+    config: Config,
+) -> int:
+    """Index markdown files in batches of EMBED_BATCH_FILES files.
+
+    Files are read and parsed by a thread pool while the calling thread
+    writes each batch's DB rows in one transaction and then encodes all of
+    its chunks at once. Vector writes happen after the commit because the
+    vector backend uses its own connection to the same database file.
+
+    Returns the number of files that were indexed (new or changed).
+    """
+    known = db.get_file_states(repo)
+    # Resolve the repo root once rather than for every file's images
+    repo_root = Path(repo).resolve()
+    indexed = 0
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+        reads = _read_ahead(
+            pool,
+            lambda f: _read_and_parse(f, repo_root, known),
+            md_files,
+            READ_AHEAD_FILES,
+        )
+        while batch := list(islice(reads, EMBED_BATCH_FILES)):
+            pending: list[PreparedFile] = []
+            with db.transaction():
+                for file_read in batch:
+                    if file_read is None:
+                        continue
+                    prepared = _prepare_file(file_read, repo, db, config)
+                    if prepared is not None:
+                        pending.append(prepared)
+            if pending:
+                _embed_pending(pending, vector, embeddings)
+                indexed += len(pending)
+    return indexed
 
 
 def rebuild_index(config: Config | None = None) -> dict:
@@ -172,19 +383,21 @@ def rebuild_index(config: Config | None = None) -> dict:
     vector.clear()
 
     # Clear existing documents (cascades to chunks and images)
-    for doc in db.list_documents():
-        db.delete_document(doc.id)
+    with db.transaction():
+        db.clear_documents()
 
     total_files = 0
     indexed = 0
 
     for repo_path in config.repos:
-        md_files = scan_repo(repo_path)
+        # Index files as the walk finds them, recording them for the count
+        md_files: list[Path] = []
+        files = _record(iter_repo_files(repo_path), md_files)
+        indexed += _index_files(files, repo_path, db, vector, embeddings, config)
+        logger.info("Found %d markdown files in %s", len(md_files), repo_path)
         total_files += len(md_files)
-        for file_path in md_files:
-            if _index_file(file_path, repo_path, db, vector, embeddings, config):
-                indexed += 1
 
+    vector.close()
     db.close()
     return {"total_files": total_files, "indexed": indexed}
 
@@ -218,27 +431,31 @@ def update_index(config: Config | None = None) -> dict:
     all_current_paths: set[str] = set()
 
     for repo_path in config.repos:
-        md_files = scan_repo(repo_path)
+        # Index new/changed files as the walk finds them
+        md_files: list[Path] = []
+        files = _record(iter_repo_files(repo_path), md_files)
+        indexed += _index_files(files, repo_path, db, vector, embeddings, config)
+        logger.info("Found %d markdown files in %s", len(md_files), repo_path)
         total_files += len(md_files)
         current_paths = {str(f) for f in md_files}
         all_current_paths.update(current_paths)
 
-        # Index new/changed files
-        for file_path in md_files:
-            if _index_file(file_path, repo_path, db, vector, embeddings, config):
-                indexed += 1
-
         # Remove deleted files for this repo
         indexed_paths = db.get_all_paths(repo_path)
+        deleted_docs = []
         for path in indexed_paths - current_paths:
             doc = db.get_document_by_path(path)
             if doc:
                 old_chunks = db.get_chunks(doc.id)
                 if old_chunks:
                     vector.delete_vectors([c.id for c in old_chunks])
+                deleted_docs.append(doc)
+        with db.transaction():
+            for doc in deleted_docs:
                 db.delete_document(doc.id)
                 removed += 1
-                logger.info("Removed deleted file: %s", path)
+                logger.info("Removed deleted file: %s", doc.path)
 
+    vector.close()
     db.close()
     return {"total_files": total_files, "indexed": indexed, "removed": removed}
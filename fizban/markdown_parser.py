@@ -1,12 +1,20 @@
 """Markdown parser with image extraction."""
 
 import logging
+import os
 import re
 from dataclasses import dataclass
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+_TITLE_RE = re.compile(r"^#\s+(.+)$", re.MULTILINE)
+# First non-blank run of characters up to the end of its line, ending at
+# the same boundaries as str.splitlines()
+_FIRST_LINE_RE = re.compile(r"\S[^\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]*")
+# Matches ![alt](path) and ![alt](path "title")
+_IMAGE_RE = re.compile(r'!\[([^\]]*)\]\(([^)\s]+)(?:\s+"[^"]*")?\)')
+
 
 @dataclass
 class ImageRef:
@@ -28,14 +36,18 @@ class ParsedDocument:
 
 def extract_title(content: str) -> str:
     """Extract the first H1 heading from markdown content."""
-    match = re.search(r"^#\s+(.+)$", content, re.MULTILINE)
-    if match:
-        return match.group(1).strip()
+    # Jump between '#' characters instead of trying the anchored pattern at
+    # every line start; ^ still rejects a '#' that is not at a line start
+    pos = content.find("#")
+    while pos != -1:
+        match = _TITLE_RE.match(content, pos)
+        if match:
+            return match.group(1).strip()
+        pos = content.find("#", pos + 1)
     # Fall back to first non-empty line
-    for line in content.splitlines():
-        stripped = line.strip()
-        if stripped:
-            return stripped[:100]
+    match = _FIRST_LINE_RE.search(content)
+    if match:
+        return match.group(0).strip()[:100]
     return "Untitled"
 
 
@@ -54,13 +66,24 @@ def extract_images(
         repo_root: Root directory of the repository. If provided, images
             resolving outside this directory are skipped.
     """
-    images = []
-    pattern = r'!\[([^\]]*)\]\(([^)\s]+)(?:\s+"[^"]*")?\)'
+    resolved_root = repo_root.resolve() if repo_root is not None else None
+    return _extract_images(content, file_path, resolved_root)
+
+
+def _extract_images(
+    content: str, file_path: Path, resolved_root: Path | None
+) -> list[ImageRef]:
+    """extract_images() for a repo root the caller has already resolved.
 
-    # Resolve repo_root once for consistent comparison
-    resolved_root = repo_root.resolve() if repo_root else None
+    The indexer resolves each root once per run instead of once per file.
+    An unresolved root only causes images to be skipped, never accepted.
+    """
+    images = []
+    # Prefix every path inside the root starts with ("/" stays "/")
+    root_str = str(resolved_root) if resolved_root is not None else None
+    root_prefix = os.path.join(root_str, "") if root_str is not None else None
 
-    for match in re.finditer(pattern, content):
+    for match in _IMAGE_RE.finditer(content):
         alt_text = match.group(1)
         img_path = match.group(2)
 
@@ -69,24 +92,25 @@ def extract_images(
             continue
 
         # Resolve relative path against the markdown file's directory
-        resolved = (file_path.parent / img_path).resolve()
+        resolved = str((file_path.parent / img_path).resolve())
 
         # Validate the resolved path stays within the repo boundary
-        if resolved_root is not None:
-            try:
-                resolved.relative_to(resolved_root)
-            except ValueError:
-                logger.warning(
-                    "Skipping image with path traversal outside repo: %s (resolved to %s)",
-                    img_path,
-                    resolved,
-                )
-                continue
+        if (
+            root_str is not None
+            and resolved != root_str
+            and not resolved.startswith(root_prefix)
+        ):
+            logger.warning(
+                "Skipping image with path traversal outside repo: %s (resolved to %s)",
+                img_path,
+                resolved,
+            )
+            continue
 
         images.append(
             ImageRef(
                 original_path=img_path,
-                absolute_path=str(resolved),
+                absolute_path=resolved,
                 alt_text=alt_text,
             )
         )
@@ -107,6 +131,14 @@ def parse_markdown(
     Returns:
         ParsedDocument with title, content, and image references.
     """
+    resolved_root = repo_root.resolve() if repo_root is not None else None
+    return _parse_markdown(content, file_path, resolved_root)
+
+
+def _parse_markdown(
+    content: str, file_path: Path, resolved_root: Path | None
+) -> ParsedDocument:
+    """parse_markdown() for a repo root the caller has already resolved."""
     title = extract_title(content)
-    images = extract_images(content, file_path, repo_root=repo_root)
+    images = _extract_images(content, file_path, resolved_root)
     return ParsedDocument(title=title, content=content, images=images)
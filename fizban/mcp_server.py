@@ -1,7 +1,10 @@
 """MCP server for Fizban documentation knowledge base."""
 
+import atexit
+import functools
 import json
 import logging
+import os
 
 from mcp.server.fastmcp import FastMCP
 
@@ -12,6 +15,24 @@ logger = logging.getLogger(__name__)
 
 mcp = FastMCP("fizban")
 
+# Document and search payloads are parsed by MCP clients, not read by
+# people, so they are serialized without indentation or padding
+JSON_SEPARATORS = (",", ":")
+
+
+@functools.lru_cache(maxsize=1)
+def _database():
+    """Shared read-only Database for the query tools.
+
+    Database keeps one connection per thread, so a single instance serves
+    every tool call for the life of the server.
+    """
+    from fizban.db import Database
+
+    db = Database.read_only()
+    atexit.register(db.close)
+    return db
+
 
 @mcp.tool()
 def repos_pull_all() -> str:
@@ -93,7 +114,7 @@ def search_semantic(
                 }
                 for r in results
             ],
-            indent=2,
+            separators=JSON_SEPARATORS,
         )
     except Exception:
         logger.exception("search_semantic failed")
@@ -110,38 +131,34 @@ def docs_fetch(path: str) -> str:
     try:
         config = get_config()
         # Validate that path is within a configured repo
-        if not any(path.startswith(repo) for repo in config.repos):
+        path = os.path.normpath(path)
+        if config.repo_for_path(path) is None:
             return json.dumps({"error": "Path is not within a configured repository."})
 
-        from fizban.db import Database
-
-        db = Database()
-        try:
-            doc = db.get_document_by_path(path)
-            if doc is None:
-                return json.dumps({"error": "Document not found."})
+        db = _database()
+        doc = db.get_document_by_path(path)
+        if doc is None:
+            return json.dumps({"error": "Document not found."})
 
-            images = db.get_images(doc.id)
-            return json.dumps(
-                {
-                    "id": doc.id,
-                    "path": doc.path,
-                    "title": doc.title,
-                    "repo": doc.repo,
-                    "content": doc.content,
-                    "images": [
-                        {
-                            "original": img.original_path,
-                            "absolute": img.absolute_path,
-                            "alt": img.alt_text,
-                        }
-                        for img in images
-                    ],
-                },
-                indent=2,
-            )
-        finally:
-            db.close()
+        images = db.get_images(doc.id)
+        return json.dumps(
+            {
+                "id": doc.id,
+                "path": doc.path,
+                "title": doc.title,
+                "repo": doc.repo,
+                "content": doc.content,
+                "images": [
+                    {
+                        "original": img.original_path,
+                        "absolute": img.absolute_path,
+                        "alt": img.alt_text,
+                    }
+                    for img in images
+                ],
+            },
+            separators=JSON_SEPARATORS,
+        )
     except Exception:
         logger.exception("docs_fetch failed")
         return json.dumps({"error": "Internal error. Check server logs for details."})
@@ -155,44 +172,36 @@ def docs_fetch_by_hit(chunk_id: int) -> str:
         chunk_id: The chunk_id from a search result.
     """
     try:
-        from fizban.db import Database
+        db = _database()
+        found = db.get_chunk_with_document(chunk_id)
+        if found is None:
+            return json.dumps({"error": "Chunk not found."})
 
-        db = Database()
-        try:
-            chunk = db.get_chunk(chunk_id)
-            if chunk is None:
-                return json.dumps({"error": "Chunk not found."})
-
-            doc = db.get_document(chunk.document_id)
-            if doc is None:
-                return json.dumps({"error": "Document not found for chunk."})
-
-            images = db.get_images(doc.id)
-            return json.dumps(
-                {
-                    "id": doc.id,
-                    "path": doc.path,
-                    "title": doc.title,
-                    "repo": doc.repo,
-                    "content": doc.content,
-                    "hit_chunk": {
-                        "chunk_id": chunk.id,
-                        "chunk_index": chunk.chunk_index,
-                        "content": chunk.content,
-                    },
-                    "images": [
-                        {
-                            "original": img.original_path,
-                            "absolute": img.absolute_path,
-                            "alt": img.alt_text,
-                        }
-                        for img in images
-                    ],
+        chunk, doc = found
+        images = db.get_images(doc.id)
+        return json.dumps(
+            {
+                "id": doc.id,
+                "path": doc.path,
+                "title": doc.title,
+                "repo": doc.repo,
+                "content": doc.content,
+                "hit_chunk": {
+                    "chunk_id": chunk.id,
+                    "chunk_index": chunk.chunk_index,
+                    "content": chunk.content,
                 },
-                indent=2,
-            )
-        finally:
-            db.close()
+                "images": [
+                    {
+                        "original": img.original_path,
+                        "absolute": img.absolute_path,
+                        "alt": img.alt_text,
+                    }
+                    for img in images
+                ],
+            },
+            separators=JSON_SEPARATORS,
+        )
     except Exception:
         logger.exception("docs_fetch_by_hit failed")
         return json.dumps({"error": "Internal error. Check server logs for details."})
@@ -203,7 +212,6 @@ def system_status() -> str:
     """Get Fizban system status: database stats, config, and health info."""
     try:
         from pathlib import Path
-        from fizban.db import Database
         from fizban.vector import get_vector_backend
 
         home = str(Path.home())
@@ -215,7 +223,7 @@ def system_status() -> str:
             return Path(p).name
 
         config = get_config()
-        db = Database(config)
+        db = _database()
 
         try:
             db_stats = db.stats()
@@ -225,29 +233,29 @@ def system_status() -> str:
 
         try:
             vector = get_vector_backend(config)
-            vector_count = vector.count()
+            try:
+                vector_count = vector.count()
+            finally:
+                vector.close()
         except Exception:
             logger.exception("system_status: vector count failed")
             vector_count = "error: unable to retrieve vector count"
 
-        try:
-            return json.dumps(
-                {
-                    "version": __version__,
-                    "config": {
-                        "db_path": redact_path(str(config.db_path)),
-                        "vector_backend": config.vector_backend,
-                        "embedding_model": config.embedding_model,
-                        "chunk_size": config.chunk_size,
-                        "repos": [redact_path(r) for r in config.repos],
-                    },
-                    "database": db_stats,
-                    "vector_count": vector_count,
+        return json.dumps(
+            {
+                "version": __version__,
+                "config": {
+                    "db_path": redact_path(str(config.db_path)),
+                    "vector_backend": config.vector_backend,
+                    "embedding_model": config.embedding_model,
+                    "chunk_size": config.chunk_size,
+                    "repos": [redact_path(r) for r in config.repos],
                 },
-                indent=2,
-            )
-        finally:
-            db.close()
+                "database": db_stats,
+                "vector_count": vector_count,
+            },
+            separators=JSON_SEPARATORS,
+        )
     except Exception:
         logger.exception("system_status failed")
         return json.dumps({"error": "Internal error. Check server logs for details."})
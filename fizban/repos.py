@@ -1,65 +1,114 @@
 """Git repository management."""
 
 import logging
+import os
 import subprocess
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from fizban.config import Config, get_config
 
 logger = logging.getLogger(__name__)
 
+# Maximum concurrent git pulls
+PULL_WORKERS = 8
+
+
+def _git_pull(repo_path: str) -> str:
+    """Run a fast-forward pull in one repo and return its result message."""
+    try:
+        result = subprocess.run(
+            ["git", "-C", repo_path, "pull", "--ff-only"],
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        if result.returncode == 0:
+            logger.info("Pulled %s: %s", repo_path, result.stdout.strip())
+            return "ok"
+        logger.warning("Failed to pull %s: %s", repo_path, result.stderr.strip())
+        return f"error: {result.stderr.strip()}"
+    except subprocess.TimeoutExpired:
+        return "error: timeout"
+    except Exception as e:
+        return f"error: {e}"
+
 
 def pull_all(config: Config | None = None) -> dict[str, str]:
     """Pull latest changes from all configured repos.
 
+    Pulls run concurrently; they wait on the network and git, not Python.
+
     Returns:
         Dict mapping repo path to result message ("ok", "error: ...", "skipped: not a git repo").
     """
     config = config or get_config()
     results = {}
+    to_pull = []
     for repo_path in config.repos:
-        path = Path(repo_path)
-        if not path.exists():
+        # .git may be a file (worktrees, submodules); one stat in the common case
+        if os.path.exists(os.path.join(repo_path, ".git")):
+            to_pull.append(repo_path)
+        elif not os.path.exists(repo_path):
             results[repo_path] = "error: path does not exist"
-            continue
-        if not (path / ".git").exists():
+        else:
             results[repo_path] = "skipped: not a git repo"
-            continue
-        try:
-            result = subprocess.run(
-                ["git", "-C", str(path), "pull", "--ff-only"],
-                capture_output=True,
-                text=True,
-                timeout=60,
-            )
-            if result.returncode == 0:
-                results[repo_path] = "ok"
-                logger.info("Pulled %s: %s", repo_path, result.stdout.strip())
-            else:
-                results[repo_path] = f"error: {result.stderr.strip()}"
-                logger.warning(
-                    "Failed to pull %s: %s", repo_path, result.stderr.strip()
-                )
-        except subprocess.TimeoutExpired:
-            results[repo_path] = "error: timeout"
-        except Exception as e:
-            results[repo_path] = f"error: {e}"
-    return results
+    if to_pull:
+        with ThreadPoolExecutor(max_workers=min(PULL_WORKERS, len(to_pull))) as pool:
+            results.update(zip(to_pull, pool.map(_git_pull, to_pull)))
+    # Report in configured order
+    return {repo_path: results[repo_path] for repo_path in config.repos}
 
 
-def scan_repo(repo_path: str) -> list[Path]:
-    """Find all markdown files in a repository.
+def iter_markdown_files(root: Path) -> Iterator[Path]:
+    """Yield the .md files under root as the tree is walked.
+
+    Entries are visited in name order at each level, so paths come out in
+    the same order as sorted(root.rglob("*.md")) without collecting the
+    tree first. Symlinked directories are not followed and unreadable
+    directories are skipped, as with rglob; .git directories are not
+    entered at all.
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            # Git's object store is large and never holds documentation
+            if entry.name != ".git":
+                yield from iter_markdown_files(Path(entry.path))
+        elif entry.name.endswith(".md"):
+            yield Path(entry.path)
+
+
+def iter_repo_files(repo_path: str) -> Iterator[Path]:
+    """Yield a repository's markdown files, or nothing if it does not exist.
 
     Args:
         repo_path: Absolute path to the repository root.
 
     Returns:
-        Sorted list of absolute paths to .md files.
+        Iterator over absolute paths to .md files, in sorted order.
     """
     path = Path(repo_path)
     if not path.exists():
         logger.warning("Repo path does not exist: %s", repo_path)
-        return []
-    md_files = sorted(path.rglob("*.md"))
+        return
+    yield from iter_markdown_files(path)
+
+
+def scan_repo(repo_path: str) -> list[Path]:
+    """Find all markdown files in a repository.
+
+    Args:
+        repo_path: Absolute path to the repository root.
+
+    Returns:
+        Sorted list of absolute paths to .md files.
+    """
+    md_files = list(iter_repo_files(repo_path))
     logger.info("Found %d markdown files in %s", len(md_files), repo_path)
     return md_files
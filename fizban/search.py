@@ -1,17 +1,36 @@
 """Semantic search over indexed documents."""
 
+import atexit
 import logging
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 from fizban.config import Config, get_config
-from fizban.db import Database
+from fizban.db import ChunkHitRecord, Database
 from fizban.embeddings import EmbeddingModel
 from fizban.vector import get_vector_backend
+from fizban.vector.base import VectorBackend
+
+if TYPE_CHECKING:
+    import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Search handles reused across queries in long-lived processes (e.g. the MCP
+# server), keyed by config. Vector connections are thread-bound, so each
+# thread keeps its own; they are released when the thread exits.
+_LOCAL = threading.local()
+
+# Query embeddings remembered for repeated searches, keyed by (model name,
+# query) and shared by all threads; 256 x 384 float32 is about 400 KB
+QUERY_CACHE_SIZE = 256
+_QUERY_CACHE: OrderedDict[tuple[str, str], "np.ndarray"] = OrderedDict()
+_QUERY_CACHE_LOCK = threading.Lock()
+
 
-@dataclass
+@dataclass(slots=True)
 class SearchResult:
     """A single search result."""
 
@@ -25,6 +44,105 @@ class SearchResult:
     distance: float
 
 
+def _get_handles(config: Config) -> tuple[Database, EmbeddingModel, VectorBackend]:
+    """Return the current thread's cached database, model and vector backend."""
+    thread_handles = getattr(_LOCAL, "handles", None)
+    if thread_handles is None:
+        thread_handles = _LOCAL.handles = {}
+    key = (
+        str(config.db_path),
+        config.vector_backend,
+        config.vector_dtype,
+        config.embedding_model,
+    )
+    handles = thread_handles.get(key)
+    if handles is None:
+        handles = (
+            Database.read_only(config),
+            EmbeddingModel(config),
+            get_vector_backend(config),
+        )
+        thread_handles[key] = handles
+    return handles
+
+
+def _encode_query(embeddings: EmbeddingModel, query: str) -> "np.ndarray":
+    """Encode a query, remembering the result per model name.
+
+    The cache holds only arrays, not model handles, so it pins nothing a
+    thread created. The cached array is shared between callers, so it is
+    made read-only.
+    """
+    key = (embeddings.config.embedding_model, query)
+    with _QUERY_CACHE_LOCK:
+        query_embedding = _QUERY_CACHE.get(key)
+        if query_embedding is not None:
+            _QUERY_CACHE.move_to_end(key)
+            return query_embedding
+    query_embedding = embeddings.encode_query(query)
+    query_embedding.setflags(write=False)
+    with _QUERY_CACHE_LOCK:
+        _QUERY_CACHE[key] = query_embedding
+        if len(_QUERY_CACHE) > QUERY_CACHE_SIZE:
+            _QUERY_CACHE.popitem(last=False)
+    return query_embedding
+
+
+@atexit.register
+def close_search_handles() -> None:
+    """Close the current thread's search handles and forget query embeddings.
+
+    Other threads' handles are released when those threads exit; their
+    connections are bound to them and cannot be closed from here.
+    """
+    thread_handles = getattr(_LOCAL, "handles", None)
+    if thread_handles:
+        for db, _, vector in thread_handles.values():
+            vector.close()
+            db.close()
+        thread_handles.clear()
+    with _QUERY_CACHE_LOCK:
+        _QUERY_CACHE.clear()
+
+
+def _dedupe_hits(hits: list[tuple[int, float]]) -> list[tuple[int, float]]:
+    """Keep one hit per chunk, at its smallest distance, ordered by distance."""
+    best: dict[int, float] = {}
+    for chunk_id, distance in hits:
+        if chunk_id not in best or distance < best[chunk_id]:
+            best[chunk_id] = distance
+    if len(best) == len(hits):
+        return hits
+    return sorted(best.items(), key=lambda hit: hit[1])
+
+
+def _build_results(
+    hits: list[tuple[int, float]], chunks: dict[int, ChunkHitRecord]
+) -> list[SearchResult]:
+    """Turn vector hits into results, in hit order.
+
+    Hits whose chunk is no longer in the database are skipped.
+    """
+    results = []
+    for chunk_id, distance in hits:
+        chunk = chunks.get(chunk_id)
+        if chunk is None:
+            continue
+        results.append(
+            SearchResult(
+                chunk_id=chunk_id,
+                document_id=chunk.document_id,
+                document_path=chunk.document_path,
+                document_title=chunk.document_title,
+                repo=chunk.repo,
+                chunk_content=chunk.content,
+                chunk_index=chunk.chunk_index,
+                distance=distance,
+            )
+        )
+    return results
+
+
 def semantic_search(
     query: str,
     config: Config | None = None,
@@ -49,40 +167,60 @@ def semantic_search(
         if distance_threshold is not None
         else config.distance_threshold
     )
-    db = Database(config)
-    embeddings = EmbeddingModel(config)
-    vector = get_vector_backend(config)
-
-    try:
-        # Encode the query
-        query_embedding = embeddings.encode_query(query)
-
-        # Search vectors
-        hits = vector.search(query_embedding, limit=limit)
-
-        results = []
-        for chunk_id, distance in hits:
-            if distance > threshold:
-                continue
-            chunk = db.get_chunk(chunk_id)
-            if chunk is None:
-                continue
-            doc = db.get_document(chunk.document_id)
-            if doc is None:
-                continue
-            results.append(
-                SearchResult(
-                    chunk_id=chunk_id,
-                    document_id=doc.id,
-                    document_path=doc.path,
-                    document_title=doc.title,
-                    repo=doc.repo,
-                    chunk_content=chunk.content,
-                    chunk_index=chunk.chunk_index,
-                    distance=distance,
-                )
-            )
+    db, embeddings, vector = _get_handles(config)
+
+    # Encode the query
+    query_embedding = _encode_query(embeddings, query)
 
-        return results
-    finally:
-        db.close()
+    # Search vectors, keeping hits within the threshold
+    hits = _dedupe_hits(
+        vector.search(query_embedding, limit=limit, distance_threshold=threshold)
+    )
+    chunks = db.get_chunk_hits([chunk_id for chunk_id, _ in hits])
+    return _build_results(hits, chunks)
+
+
+def semantic_search_batch(
+    queries: list[str],
+    config: Config | None = None,
+    limit: int = 10,
+    distance_threshold: float | None = None,
+) -> list[list[SearchResult]]:
+    """Perform semantic search for several queries at once.
+
+    All queries are encoded in one forward pass and the hit chunks of every
+    query are fetched with one database lookup; each query still runs its
+    own vector search.
+
+    Args:
+        queries: Natural language search queries.
+        config: Optional configuration override.
+        limit: Maximum number of results per query.
+        distance_threshold: Maximum distance for results. Results above this
+            threshold are excluded. Defaults to config value.
+
+    Returns:
+        One list of SearchResult per query, in query order, each ordered by
+        relevance (ascending distance).
+    """
+    if not queries:
+        return []
+    config = config or get_config()
+    threshold = (
+        distance_threshold
+        if distance_threshold is not None
+        else config.distance_threshold
+    )
+    db, embeddings, vector = _get_handles(config)
+
+    query_embeddings = embeddings.encode(queries)
+    all_hits = [
+        _dedupe_hits(
+            vector.search(query_embedding, limit=limit, distance_threshold=threshold)
+        )
+        for query_embedding in query_embeddings
+    ]
+    chunks = db.get_chunk_hits(
+        list({chunk_id for hits in all_hits for chunk_id, _ in hits})
+    )
+    return [_build_results(hits, chunks) for hits in all_hits]
@@ -1,46 +1,53 @@
 """Vector backend factory."""
 
+import logging
+from collections.abc import Callable
+
 from fizban.config import Config, get_config
 from fizban.vector.base import VectorBackend
 
+logger = logging.getLogger(__name__)
 
-def get_vector_backend(config: Config | None = None) -> VectorBackend:
-    """Create and return the configured vector backend.
 
-    Tries the configured backend first, falls back to the other if unavailable.
-    """
-    config = config or get_config()
-    backend_type = config.vector_backend.lower()
+def _build_vec(config: Config) -> VectorBackend:
+    from fizban.vector.vec_backend import SqliteVecBackend
 
-    if backend_type == "vec":
-        try:
-            from fizban.vector.vec_backend import SqliteVecBackend
+    return SqliteVecBackend(config)
 
-            return SqliteVecBackend(config)
-        except ImportError:
-            import logging
 
-            logging.getLogger(__name__).warning(
-                "sqlite-vec not available, falling back to vss"
-            )
-            from fizban.vector.vss_backend import SqliteVssBackend
+def _build_vss(config: Config) -> VectorBackend:
+    from fizban.vector.vss_backend import SqliteVssBackend
 
-            return SqliteVssBackend(config)
-    elif backend_type == "vss":
-        try:
-            from fizban.vector.vss_backend import SqliteVssBackend
+    return SqliteVssBackend(config)
 
-            return SqliteVssBackend(config)
-        except ImportError:
-            import logging
 
-            logging.getLogger(__name__).warning(
-                "sqlite-vss not available, falling back to vec"
-            )
-            from fizban.vector.vec_backend import SqliteVecBackend
+# Backend name -> constructor; each raises ImportError if its extension is missing
+_BACKENDS: dict[str, Callable[[Config], VectorBackend]] = {
+    "vec": _build_vec,
+    "vss": _build_vss,
+}
+# Backend tried when the configured one is unavailable
+_FALLBACKS = {"vec": "vss", "vss": "vec"}
 
-            return SqliteVecBackend(config)
-    else:
+
+def get_vector_backend(config: Config | None = None) -> VectorBackend:
+    """Create and return the configured vector backend.
+
+    Tries the configured backend first, falls back to the other if unavailable.
+    """
+    config = config or get_config()
+    backend_type = config.vector_backend.lower()
+
+    build = _BACKENDS.get(backend_type)
+    if build is None:
         raise ValueError(
             f"Unknown vector backend: {backend_type!r}. Use 'vec' or 'vss'."
         )
+    try:
+        return build(config)
+    except ImportError:
+        fallback = _FALLBACKS[backend_type]
+        logger.warning(
+            "sqlite-%s not available, falling back to %s", backend_type, fallback
+        )
+        return _BACKENDS[fallback](config)
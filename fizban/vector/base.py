@@ -34,13 +34,17 @@ class VectorBackend(ABC):
 
     @abstractmethod
     def search(
-        self, query_vector: np.ndarray, limit: int = 10
+        self,
+        query_vector: np.ndarray,
+        limit: int = 10,
+        distance_threshold: float | None = None,
     ) -> list[tuple[int, float]]:
         """Find the nearest vectors to the query.
 
         Args:
             query_vector: numpy array of shape (dimension,).
             limit: Maximum number of results.
+            distance_threshold: If given, drop results farther than this.
 
         Returns:
             List of (chunk_id, distance) tuples, ordered by ascending distance.
@@ -53,3 +57,6 @@ class VectorBackend(ABC):
     @abstractmethod
     def clear(self) -> None:
         """Remove all vectors from the index."""
+
+    def close(self) -> None:
+        """Release any connection held by the backend."""
@@ -2,7 +2,6 @@
 
 import logging
 import sqlite3
-import struct
 
 import numpy as np
 
@@ -12,21 +11,52 @@ from fizban.vector.base import VectorBackend
 logger = logging.getLogger(__name__)
 
 
+# int8 components span [-INT8_SCALE, INT8_SCALE] for unit-length vectors
+INT8_SCALE = 127.0
+
+
 def _serialize_f32(vector: np.ndarray) -> bytes:
     """Serialize a float32 numpy array to bytes for sqlite-vec."""
-    return struct.pack(f"{len(vector)}f", *vector.astype(np.float32))
+    return np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+
+
+def quantize_int8(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize vectors and scale them to int8.
+
+    Works on a single vector or a 2-D array of row vectors. Distances
+    between quantized vectors are INT8_SCALE times those between the
+    normalized float vectors, to within rounding.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    normalized = vectors / np.where(norms == 0, 1.0, norms)
+    scaled = np.round(normalized * INT8_SCALE)
+    return np.clip(scaled, -INT8_SCALE, INT8_SCALE).astype(np.int8)
+
+
+def _serialize_i8(vector: np.ndarray) -> bytes:
+    """Quantize and serialize a vector to int8 bytes for sqlite-vec."""
+    return quantize_int8(vector).tobytes()
 
 
 class SqliteVecBackend(VectorBackend):
     """Vector storage using the sqlite-vec extension.
 
-    Uses a virtual table (vec0) for storing and searching vectors.
+    Uses a virtual table (vec0) for storing and searching vectors. With
+    vector_dtype "int8" vectors are normalized and stored as int8, a quarter
+    of the float32 size; reported distances are rescaled to the float range.
     """
 
     def __init__(self, config: Config | None = None):
         self.config = config or get_config()
         self._conn: sqlite3.Connection | None = None
         self._dimension: int | None = None
+        dtype = self.config.vector_dtype.lower()
+        if dtype not in ("float32", "int8"):
+            raise ValueError(
+                f"Unknown vector dtype: {dtype!r}. Use 'float32' or 'int8'."
+            )
+        self._int8 = dtype == "int8"
         # Verify sqlite-vec is available
         try:
             import sqlite_vec  # noqa: F401
@@ -48,28 +78,50 @@ class SqliteVecBackend(VectorBackend):
             self._conn.enable_load_extension(False)
         return self._conn
 
+    def close(self) -> None:
+        """Close the backend's database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
     def init_index(self, dimension: int) -> None:
         """Create the vec0 virtual table if it doesn't exist."""
         self._dimension = dimension
+        column_type = "int8" if self._int8 else "float"
         self.conn.execute(
             f"""CREATE VIRTUAL TABLE IF NOT EXISTS vec_chunks USING vec0(
                 chunk_id INTEGER PRIMARY KEY,
-                embedding float[{dimension}]
+                embedding {column_type}[{dimension}]
             )"""
         )
         self.conn.commit()
-        logger.info("Vector index initialized (sqlite-vec, dim=%d)", dimension)
+        logger.info(
+            "Vector index initialized (sqlite-vec, %s, dim=%d)", column_type, dimension
+        )
+
+    def _vector_param(self) -> str:
+        """SQL placeholder for a serialized vector of the stored type."""
+        return "vec_int8(?)" if self._int8 else "?"
+
+    def _serialize(self, vector: np.ndarray) -> bytes:
+        """Serialize a vector for the stored type."""
+        return _serialize_i8(vector) if self._int8 else _serialize_f32(vector)
 
     def add_vectors(self, ids: list[int], vectors: np.ndarray) -> None:
         """Add vectors to the vec0 table."""
         if len(ids) == 0:
             return
-        for chunk_id, vector in zip(ids, vectors):
-            self.conn.execute(
-                "INSERT OR REPLACE INTO vec_chunks (chunk_id, embedding) VALUES (?, ?)",
-                (chunk_id, _serialize_f32(vector)),
+        # Convert the whole matrix once; each row is then a contiguous slice
+        if self._int8:
+            rows = quantize_int8(vectors)
+        else:
+            rows = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO vec_chunks (chunk_id, embedding) "
+                f"VALUES (?, {self._vector_param()})",
+                ((int(chunk_id), row.tobytes()) for chunk_id, row in zip(ids, rows)),
             )
-        self.conn.commit()
 
     def delete_vectors(self, ids: list[int]) -> None:
         """Delete vectors by chunk ID."""
@@ -82,17 +134,30 @@ class SqliteVecBackend(VectorBackend):
         self.conn.commit()
 
     def search(
-        self, query_vector: np.ndarray, limit: int = 10
+        self,
+        query_vector: np.ndarray,
+        limit: int = 10,
+        distance_threshold: float | None = None,
     ) -> list[tuple[int, float]]:
         """Search for nearest neighbors using sqlite-vec."""
-        rows = self.conn.execute(
-            """SELECT chunk_id, distance
+        # k = ? hands the limit to vec0's KNN scan (works on every SQLite
+        # version, unlike a LIMIT on the MATCH query)
+        sql = f"""SELECT chunk_id, distance
                FROM vec_chunks
-               WHERE embedding MATCH ?
-               ORDER BY distance
-               LIMIT ?""",
-            (_serialize_f32(query_vector), limit),
-        ).fetchall()
+               WHERE embedding MATCH {self._vector_param()} AND k = ?
+               ORDER BY distance"""
+        params: tuple = (self._serialize(query_vector), limit)
+        if distance_threshold is not None:
+            # Filter the k nearest; they come back ordered, so this is a cut
+            scale = INT8_SCALE if self._int8 else 1.0
+            sql = (
+                f"SELECT chunk_id, distance FROM ({sql}) "
+                "WHERE distance <= ? ORDER BY distance"
+            )
+            params += (distance_threshold * scale,)
+        rows = self.conn.execute(sql, params).fetchall()
+        if self._int8:
+            return [(row[0], row[1] / INT8_SCALE) for row in rows]
         return [(row[0], row[1]) for row in rows]
 
     def count(self) -> int:
@@ -1,6 +1,5 @@
 """Vector backend using sqlite-vss extension (fallback)."""
 
-import json
 import logging
 import sqlite3
 
@@ -12,6 +11,16 @@ from fizban.vector.base import VectorBackend
 logger = logging.getLogger(__name__)
 
 
+def _vector_json(vector: list[float]) -> str:
+    """Encode a vector as the JSON array sqlite-vss expects.
+
+    Nine significant digits round-trip float32 exactly; formatting them
+    directly is ~3x faster than json.dumps on the widened float64 values
+    and gives shorter text.
+    """
+    return "[" + ",".join(map("{:.9g}".format, vector)) + "]"
+
+
 class SqliteVssBackend(VectorBackend):
     """Vector storage using the sqlite-vss extension.
 
@@ -42,9 +51,20 @@ class SqliteVssBackend(VectorBackend):
             self._conn.enable_load_extension(False)
         return self._conn
 
+    def close(self) -> None:
+        """Close the backend's database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
     def init_index(self, dimension: int) -> None:
         """Create the vss virtual table if it doesn't exist."""
         self._dimension = dimension
+        if self.config.vector_dtype.lower() != "float32":
+            logger.warning(
+                "sqlite-vss only stores float32 vectors; ignoring vector_dtype=%s",
+                self.config.vector_dtype,
+            )
         # sqlite-vss uses a different syntax
         self.conn.execute(
             f"""CREATE VIRTUAL TABLE IF NOT EXISTS vss_chunks USING vss0(
@@ -68,70 +88,69 @@ class SqliteVssBackend(VectorBackend):
         """Add vectors to the vss0 table."""
         if len(ids) == 0:
             return
-        for chunk_id, vector in zip(ids, vectors):
-            # Remove existing entry if present
-            existing = self.conn.execute(
-                "SELECT rowid FROM vss_chunk_map WHERE chunk_id = ?", (chunk_id,)
-            ).fetchone()
-            if existing:
-                self.conn.execute(
-                    "DELETE FROM vss_chunks WHERE rowid = ?", (existing[0],)
-                )
-                self.conn.execute(
-                    "DELETE FROM vss_chunk_map WHERE chunk_id = ?", (chunk_id,)
-                )
-
-            # Insert into map to get rowid
-            cursor = self.conn.execute(
-                "INSERT INTO vss_chunk_map (chunk_id) VALUES (?)", (chunk_id,)
+        # Last vector wins if an ID repeats, as with one-by-one replacement
+        rows = dict(zip(ids, np.asarray(vectors, dtype=np.float32).tolist()))
+        chunk_ids = list(rows)
+        placeholders = ",".join("?" for _ in chunk_ids)
+        with self.conn:
+            self._delete_mapped(chunk_ids)
+            self.conn.executemany(
+                "INSERT INTO vss_chunk_map (chunk_id) VALUES (?)",
+                ((chunk_id,) for chunk_id in chunk_ids),
             )
-            row_id = cursor.lastrowid
-
-            # Insert vector
-            vec_json = json.dumps(vector.astype(float).tolist())
-            self.conn.execute(
+            mapped = self.conn.execute(
+                "SELECT rowid, chunk_id FROM vss_chunk_map "
+                f"WHERE chunk_id IN ({placeholders})",
+                chunk_ids,
+            ).fetchall()
+            self.conn.executemany(
                 "INSERT INTO vss_chunks (rowid, embedding) VALUES (?, ?)",
-                (row_id, vec_json),
+                ((row_id, _vector_json(rows[chunk_id])) for row_id, chunk_id in mapped),
             )
-        self.conn.commit()
+
+    def _delete_mapped(self, ids: list[int]) -> None:
+        """Delete the vectors and map rows for the given chunk IDs."""
+        placeholders = ",".join("?" for _ in ids)
+        self.conn.execute(
+            "DELETE FROM vss_chunks WHERE rowid IN "
+            f"(SELECT rowid FROM vss_chunk_map WHERE chunk_id IN ({placeholders}))",
+            ids,
+        )
+        self.conn.execute(
+            f"DELETE FROM vss_chunk_map WHERE chunk_id IN ({placeholders})", ids
+        )
 
     def delete_vectors(self, ids: list[int]) -> None:
         """Delete vectors by chunk ID."""
         if not ids:
             return
-        for chunk_id in ids:
-            existing = self.conn.execute(
-                "SELECT rowid FROM vss_chunk_map WHERE chunk_id = ?", (chunk_id,)
-            ).fetchone()
-            if existing:
-                self.conn.execute(
-                    "DELETE FROM vss_chunks WHERE rowid = ?", (existing[0],)
-                )
-                self.conn.execute(
-                    "DELETE FROM vss_chunk_map WHERE chunk_id = ?", (chunk_id,)
-                )
-        self.conn.commit()
+        with self.conn:
+            self._delete_mapped(ids)
 
     def search(
-        self, query_vector: np.ndarray, limit: int = 10
+        self,
+        query_vector: np.ndarray,
+        limit: int = 10,
+        distance_threshold: float | None = None,
     ) -> list[tuple[int, float]]:
         """Search for nearest neighbors using sqlite-vss."""
-        vec_json = json.dumps(query_vector.astype(float).tolist())
-        rows = self.conn.execute(
-            """SELECT rowid, distance
-               FROM vss_chunks
-               WHERE vss_search(embedding, ?)
-               LIMIT ?""",
-            (vec_json, limit),
-        ).fetchall()
-        results = []
-        for row_id, distance in rows:
-            chunk_row = self.conn.execute(
-                "SELECT chunk_id FROM vss_chunk_map WHERE rowid = ?", (row_id,)
-            ).fetchone()
-            if chunk_row:
-                results.append((chunk_row[0], distance))
-        return results
+        vec_json = _vector_json(np.asarray(query_vector, dtype=np.float32).tolist())
+        # Map rowids to chunk IDs in the same statement; vss_search needs its
+        # LIMIT on the virtual table query itself, hence the CTE
+        sql = """WITH hits AS (
+                   SELECT rowid, distance
+                   FROM vss_chunks
+                   WHERE vss_search(embedding, ?)
+                   LIMIT ?
+               )
+               SELECT m.chunk_id, h.distance
+               FROM hits h JOIN vss_chunk_map m ON m.rowid = h.rowid"""
+        params: tuple = (vec_json, limit)
+        if distance_threshold is not None:
+            sql += " WHERE h.distance <= ?"
+            params += (distance_threshold,)
+        rows = self.conn.execute(sql + " ORDER BY h.distance", params).fetchall()
+        return [(row[0], row[1]) for row in rows]
 
     def count(self) -> int:
         """Count vectors in the index."""
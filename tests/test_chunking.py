@@ -1,6 +1,8 @@
 """Tests for text chunking."""
 
-from fizban.indexer import chunk_text
+import numpy as np
+
+from fizban.indexer import chunk_spans, chunk_text
 
 
 class TestChunkText:
@@ -42,10 +44,12 @@ class TestChunkText:
         text = "The quick brown fox jumps over the lazy dog. " * 50
         chunks = chunk_text(text, chunk_size=200, chunk_overlap=50)
         # Every character should be in at least one chunk
-        covered = set()
+        covered = np.zeros(len(text), dtype=bool)
         for content, start, end in chunks:
-            covered.update(range(start, end))
-        assert covered == set(range(len(text)))
+            assert 0 <= start < end <= len(text)
+            assert content == text[start:end]
+            covered[start:end] = True
+        assert bool(covered.all())
 
     def test_prefers_paragraph_breaks(self):
         text = "First paragraph.\n\nSecond paragraph.\n\nThird paragraph."
@@ -53,9 +57,38 @@ class TestChunkText:
         # Should try to break at paragraph boundaries
         assert len(chunks) >= 2
 
+    def test_breaks_after_last_paragraph_break_in_window(self):
+        text = "A" * 60 + "\n\n" + "B" * 60 + "\n\n\n" + "C" * 60
+        chunks = chunk_text(text, chunk_size=100, chunk_overlap=10)
+        assert chunks[0][2] == 62
+        # Overlapping "\n\n" in a run of three newlines: break after the last
+        assert chunks[1][2] == 125
+
+    def test_sentence_separator_preference_order(self):
+        # ". " is preferred over a later "? " within the same window
+        text = "x" * 60 + ". " + "y" * 20 + "? " + "z" * 100
+        chunks = chunk_text(text, chunk_size=100, chunk_overlap=10)
+        assert chunks[0][2] == 62
+
     def test_no_empty_chunks(self):
         text = "Some content here. " * 100
         chunks = chunk_text(text, chunk_size=200, chunk_overlap=50)
         for content, start, end in chunks:
             assert len(content) > 0
             assert end > start
+
+
+class TestChunkSpans:
+    def test_empty_text(self):
+        assert chunk_spans("") == []
+
+    def test_spans_match_chunk_text_offsets(self):
+        text = "The quick brown fox jumps over the lazy dog. " * 50
+        spans = chunk_spans(text, chunk_size=200, chunk_overlap=50)
+        chunks = chunk_text(text, chunk_size=200, chunk_overlap=50)
+        assert spans == [(start, end) for _, start, end in chunks]
+
+    def test_trailing_remainder_extends_last_span(self):
+        text = "a" * 1050
+        spans = chunk_spans(text, chunk_size=1000, chunk_overlap=200)
+        assert spans[-1][1] == len(text)
@@ -21,11 +21,21 @@ class TestConfigDefaults:
             cfg = Config()
         assert cfg.vector_backend == "vec"
 
+    def test_default_vector_dtype(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            cfg = Config()
+        assert cfg.vector_dtype == "float32"
+
     def test_default_embedding_model(self):
         with mock.patch.dict(os.environ, {}, clear=True):
             cfg = Config()
         assert cfg.embedding_model == "all-MiniLM-L6-v2"
 
+    def test_default_encode_batch_size(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            cfg = Config()
+        assert cfg.encode_batch_size == 64
+
     def test_default_chunk_size(self):
         with mock.patch.dict(os.environ, {}, clear=True):
             cfg = Config()
@@ -55,11 +65,21 @@ class TestConfigEnvOverrides:
             cfg = Config()
         assert cfg.vector_backend == "vss"
 
+    def test_vector_dtype_from_env(self):
+        with mock.patch.dict(os.environ, {"FIZBAN_VECTOR_DTYPE": "int8"}):
+            cfg = Config()
+        assert cfg.vector_dtype == "int8"
+
     def test_embedding_model_from_env(self):
         with mock.patch.dict(os.environ, {"FIZBAN_EMBEDDING_MODEL": "custom-model"}):
             cfg = Config()
         assert cfg.embedding_model == "custom-model"
 
+    def test_encode_batch_size_from_env(self):
+        with mock.patch.dict(os.environ, {"FIZBAN_ENCODE_BATCH_SIZE": "256"}):
+            cfg = Config()
+        assert cfg.encode_batch_size == 256
+
     def test_chunk_size_from_env(self):
         with mock.patch.dict(os.environ, {"FIZBAN_CHUNK_SIZE": "500"}):
             cfg = Config()
@@ -87,6 +107,31 @@ class TestConfigEnsureDbDir:
         cfg.ensure_db_dir()  # Call again, still no error
 
 
+class TestRepoForPath:
+    """Test matching paths to configured repos."""
+
+    def _config(self, *repos):
+        cfg = Config()
+        cfg.repos = list(repos)
+        return cfg
+
+    def test_path_inside_repo(self):
+        cfg = self._config("/home/u/docs", "/home/u/infra")
+        assert cfg.repo_for_path("/home/u/infra/setup.md") == "/home/u/infra"
+
+    def test_sibling_sharing_prefix_rejected(self):
+        cfg = self._config("/home/u/docs")
+        assert cfg.repo_for_path("/home/u/docs-old/a.md") is None
+
+    def test_dotdot_escape_rejected(self):
+        cfg = self._config("/home/u/docs")
+        assert cfg.repo_for_path("/home/u/docs/../secrets/a.md") is None
+
+    def test_trailing_slash_on_repo(self):
+        cfg = self._config("/home/u/docs/")
+        assert cfg.repo_for_path("/home/u/docs/a.md") == "/home/u/docs/"
+
+
 class TestSingleton:
     """Test the get_config/reset_config singleton pattern."""
 
@@ -1,7 +1,9 @@
 """Tests for database module."""
 
 import sqlite3
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
@@ -35,6 +37,9 @@ class TestContentHash:
         assert isinstance(h, str)
         assert len(h) == 64  # SHA-256 hex length
 
+    def test_bytes_match_utf8_str(self):
+        assert content_hash("héllo".encode("utf-8")) == content_hash("héllo")
+
     def test_empty_string(self):
         h = content_hash("")
         assert isinstance(h, str)
@@ -62,6 +67,82 @@ class TestDatabaseConnection:
         fk = db.conn.execute("PRAGMA foreign_keys").fetchone()[0]
         assert fk == 1
 
+    def test_synchronous_normal(self, db):
+        sync = db.conn.execute("PRAGMA synchronous").fetchone()[0]
+        assert sync == 1  # NORMAL
+
+    def test_mmap_enabled(self, db):
+        mmap_size = db.conn.execute("PRAGMA mmap_size").fetchone()[0]
+        assert mmap_size == 268435456
+
+    def test_rows_are_plain_tuples(self, db):
+        row = db.conn.execute("SELECT 1, 2").fetchone()
+        assert type(row) is tuple
+
+    def test_close_runs_optimize(self, db):
+        conn = db.conn
+        statements = []
+        conn.set_trace_callback(statements.append)
+        db.close()
+        assert "PRAGMA optimize" in statements
+
+    def test_init_db_adds_size_column_to_old_schema(self, tmp_path):
+        path = tmp_path / "old.db"
+        old = sqlite3.connect(str(path))
+        old.execute(
+            "CREATE TABLE documents (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "repo TEXT NOT NULL, path TEXT NOT NULL UNIQUE, title TEXT, "
+            "content TEXT NOT NULL, content_hash TEXT NOT NULL, "
+            "last_modified REAL NOT NULL, indexed_at REAL NOT NULL)"
+        )
+        old.close()
+        cfg = Config()
+        cfg.db_path = path
+        database = Database(cfg)
+        database.init_db()
+        columns = {r[1] for r in database.conn.execute("PRAGMA table_info(documents)")}
+        database.close()
+        assert "size" in columns
+
+    def test_file_state_scan_uses_covering_index(self, db):
+        plan = db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT path, last_modified, size, content_hash "
+            "FROM documents WHERE repo = ?",
+            ("/repo",),
+        ).fetchall()
+        assert "COVERING INDEX idx_documents_repo_state" in plan[0][3]
+
+    def test_get_chunks_reads_in_index_order(self, db):
+        plan = db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM chunks "
+            "WHERE document_id = ? ORDER BY chunk_index",
+            (1,),
+        ).fetchall()
+        details = [row[3] for row in plan]
+        assert any("idx_chunks_document_index" in d for d in details)
+        assert not any("TEMP B-TREE" in d for d in details)
+
+    def test_list_documents_by_repo_needs_no_sort(self, db):
+        plan = db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM documents WHERE repo = ? ORDER BY path",
+            ("/repo",),
+        ).fetchall()
+        details = [row[3] for row in plan]
+        assert any("idx_documents_repo_state" in d for d in details)
+        assert not any("TEMP B-TREE" in d for d in details)
+
+    def test_init_db_replaces_plain_chunk_index(self, db):
+        db.conn.execute("CREATE INDEX idx_chunks_document ON chunks(document_id)")
+        db.init_db()
+        names = {
+            row[0]
+            for row in db.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='index'"
+            )
+        }
+        assert "idx_chunks_document_index" in names
+        assert "idx_chunks_document" not in names
+
     def test_close_and_reconnect(self, tmp_path):
         cfg = Config()
         cfg.db_path = tmp_path / "test.db"
@@ -75,6 +156,126 @@ class TestDatabaseConnection:
         database.close()
 
 
+class TestThreadConnections:
+    """Test per-thread connection handling."""
+
+    def test_each_thread_gets_own_connection(self, db):
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(db.conn))
+        thread.start()
+        thread.join()
+        assert seen[0] is not db.conn
+
+    def test_thread_sees_committed_writes_from_other_thread(self, db):
+        with db.transaction():
+            db.upsert_document("/r", "/r/a.md", "A", "a", 1.0)
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            assert pool.submit(db.get_all_paths).result() == {"/r/a.md"}
+
+    def test_exited_thread_connection_closed(self, db):
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(db.conn))
+        thread.start()
+        thread.join()
+        with pytest.raises(sqlite3.ProgrammingError):
+            seen[0].execute("SELECT 1")
+        assert len(db._connections) == 1
+
+    def test_close_closes_all_thread_connections(self, db):
+        seen = []
+        opened, done = threading.Event(), threading.Event()
+
+        def hold():
+            seen.append(db.conn)
+            opened.set()
+            done.wait()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        opened.wait()
+        db.close()
+        done.set()
+        thread.join()
+        with pytest.raises(sqlite3.ProgrammingError):
+            seen[0].execute("SELECT 1")
+
+
+class TestTransactions:
+    """Test explicit transaction handling."""
+
+    def test_transaction_commits(self, db, tmp_path):
+        with db.transaction():
+            db.upsert_document("/repo", "/repo/f.md", "T", "c", 1.0)
+        other = sqlite3.connect(str(tmp_path / "test.db"))
+        try:
+            count = other.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        finally:
+            other.close()
+        assert count == 1
+
+    def test_transaction_rolls_back_on_error(self, db):
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.upsert_document("/repo", "/repo/f.md", "T", "c", 1.0)
+                raise RuntimeError("boom")
+        assert db.get_document_by_path("/repo/f.md") is None
+        assert not db.conn.in_transaction
+
+    def test_nested_transaction_commits_with_outer(self, db, tmp_path):
+        with db.transaction():
+            db.upsert_document("/repo", "/repo/a.md", "A", "a", 1.0)
+            with db.transaction():
+                db.conn.execute("UPDATE documents SET title = 'B'")
+            assert db.conn.in_transaction
+        assert not db.conn.in_transaction
+        other = sqlite3.connect(str(tmp_path / "test.db"))
+        try:
+            title = other.execute("SELECT title FROM documents").fetchone()[0]
+        finally:
+            other.close()
+        assert title == "B"
+
+    def test_nested_transaction_error_rolls_back_inner_only(self, db):
+        with db.transaction():
+            db.upsert_document("/repo", "/repo/a.md", "A", "a", 1.0)
+            with pytest.raises(RuntimeError):
+                with db.transaction():
+                    db.upsert_document("/repo", "/repo/b.md", "B", "b", 1.0)
+                    raise RuntimeError("boom")
+        assert db.get_document_by_path("/repo/a.md") is not None
+        assert db.get_document_by_path("/repo/b.md") is None
+        assert not db.conn.in_transaction
+
+    def test_nested_error_propagating_rolls_back_everything(self, db):
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.upsert_document("/repo", "/repo/a.md", "A", "a", 1.0)
+                with db.transaction():
+                    raise RuntimeError("boom")
+        assert db.get_document_by_path("/repo/a.md") is None
+        assert not db.conn.in_transaction
+
+    def test_transaction_after_bare_write(self, db):
+        db.upsert_document("/repo", "/repo/a.md", "A", "a", 1.0)
+        assert db.conn.in_transaction
+        with db.transaction():
+            db.upsert_document("/repo", "/repo/b.md", "B", "b", 1.0)
+        assert not db.conn.in_transaction
+        assert db.get_document_by_path("/repo/a.md") is not None
+        assert db.get_document_by_path("/repo/b.md") is not None
+
+    def test_bare_writes_persist_after_close(self, db, tmp_path):
+        db.upsert_document("/repo", "/repo/f.md", "T", "c", 1.0)
+        db.close()
+        other = sqlite3.connect(str(tmp_path / "test.db"))
+        try:
+            count = other.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        finally:
+            other.close()
+        assert count == 1
+
+
 class TestDocumentOperations:
     """Test CRUD operations on documents."""
 
@@ -164,6 +365,15 @@ class TestDocumentOperations:
         images = db.get_images(doc_id)
         assert images == []
 
+    def test_clear_documents_cascades(self, db):
+        doc_id = db.upsert_document("/repo", "/repo/f.md", "T", "c", 1.0)
+        db.insert_chunks(doc_id, [(0, "chunk0", 0, 6)])
+        db.insert_images(doc_id, [("img.png", "/repo/img.png", "alt")])
+        db.upsert_document("/other", "/other/g.md", "G", "g", 1.0)
+        db.clear_documents()
+        stats = db.stats()
+        assert (stats["documents"], stats["chunks"], stats["images"]) == (0, 0, 0)
+
     def test_get_content_hash(self, db):
         db.upsert_document("/repo", "/repo/f.md", "T", "content", 1.0)
         h = db.get_content_hash("/repo/f.md")
@@ -172,6 +382,17 @@ class TestDocumentOperations:
     def test_get_content_hash_nonexistent(self, db):
         assert db.get_content_hash("/no/such/file.md") is None
 
+    def test_get_file_states(self, db):
+        db.upsert_document("/repo", "/repo/a.md", "A", "aaa", 1.0, size=3)
+        db.upsert_document("/other", "/other/b.md", "B", "bbb", 2.0, size=3)
+        states = db.get_file_states("/repo")
+        assert states == {"/repo/a.md": (1.0, 3, content_hash("aaa"))}
+
+    def test_update_file_stat(self, db):
+        db.upsert_document("/repo", "/repo/f.md", "T", "content", 1.0, size=7)
+        db.update_file_stat("/repo/f.md", 2.0, 8)
+        assert db.get_file_states("/repo")["/repo/f.md"][:2] == (2.0, 8)
+
     def test_get_all_paths(self, db):
         db.upsert_document("/repo", "/repo/a.md", "A", "aaa", 1.0)
         db.upsert_document("/repo", "/repo/b.md", "B", "bbb", 2.0)
@@ -185,6 +406,18 @@ class TestDocumentOperations:
         paths = db.get_all_paths(repo="/repo")
         assert paths == {"/repo/a.md"}
 
+    def test_get_all_paths_large(self, db):
+        with db.conn:
+            db.conn.executemany(
+                "INSERT INTO documents "
+                "(repo, path, title, content, content_hash, last_modified, indexed_at) "
+                "VALUES (?, ?, 'T', '', 'h', 1.0, 1.0)",
+                [("/repo", f"/repo/{i}.md") for i in range(10_000)],
+            )
+        paths = db.get_all_paths("/repo")
+        assert len(paths) == 10_000
+        assert "/repo/9999.md" in paths
+
 
 class TestChunkOperations:
     """Test CRUD operations on chunks."""
@@ -198,6 +431,27 @@ class TestChunkOperations:
         assert len(chunk_ids) == 2
         assert all(isinstance(cid, int) for cid in chunk_ids)
 
+    def test_insert_chunks_ids_match_rows(self, db):
+        doc_id = db.upsert_document("/repo", "/repo/f.md", "T", "content", 1.0)
+        db.insert_chunks(doc_id, [(0, "stale", 0, 5)])
+        chunk_ids = db.insert_chunks(
+            doc_id,
+            [
+                (0, "first", 0, 5),
+                (1, "second", 5, 11),
+                (2, "third", 11, 16),
+            ],
+        )
+        assert [db.get_chunk(cid).content for cid in chunk_ids] == [
+            "first",
+            "second",
+            "third",
+        ]
+
+    def test_insert_chunks_empty(self, db):
+        doc_id = db.upsert_document("/repo", "/repo/f.md", "T", "content", 1.0)
+        assert db.insert_chunks(doc_id, []) == []
+
     def test_get_chunks_returns_ordered(self, db):
         doc_id = db.upsert_document("/repo", "/repo/f.md", "T", "content", 1.0)
         db.insert_chunks(doc_id, [
@@ -219,6 +473,58 @@ class TestChunkOperations:
         assert len(chunks) == 1
         assert chunks[0].content == "new chunk"
 
+    def test_sync_chunks_reuses_unchanged(self, db):
+        doc_id = db.upsert_document("/repo", "/repo/f.md", "T", "content", 1.0)
+        old_ids = db.insert_chunks(doc_id, [(0, "keep", 0, 4), (1, "drop", 4, 8)])
+        chunk_ids, reused, removed = db.sync_chunks(
+            doc_id, [(0, "new", 0, 3), (1, "keep", 3, 7)]
+        )
+        assert chunk_ids[1] == old_ids[0]
+        assert reused == {old_ids[0]}
+        assert removed == [old_ids[1]]
+        chunks = db.get_chunks(doc_id)
+        assert [(c.id, c.chunk_index, c.content, c.start_char) for c in chunks] == [
+            (chunk_ids[0], 0, "new", 0),
+            (old_ids[0], 1, "keep", 3),
+        ]
+
+    def test_sync_chunks_duplicate_content(self, db):
+        doc_id = db.upsert_document("/repo", "/repo/f.md", "T", "content", 1.0)
+        old_ids = db.insert_chunks(doc_id, [(0, "same", 0, 4)])
+        chunk_ids, reused, removed = db.sync_chunks(
+            doc_id, [(0, "same", 0, 4), (1, "same", 4, 8)]
+        )
+        assert chunk_ids[0] == old_ids[0]
+        assert chunk_ids[1] != old_ids[0]
+        assert reused == {old_ids[0]}
+        assert removed == []
+
+    def test_get_chunk_hits_joins_documents(self, db):
+        doc_id = db.upsert_document("/repo", "/repo/f.md", "Title", "content", 1.0)
+        chunk_ids = db.insert_chunks(doc_id, [(0, "a", 0, 1), (1, "b", 1, 2)])
+        hits = db.get_chunk_hits([chunk_ids[1], chunk_ids[0], 9999])
+        assert set(hits) == set(chunk_ids)
+        hit = hits[chunk_ids[1]]
+        assert (hit.document_id, hit.chunk_index, hit.content) == (doc_id, 1, "b")
+        assert (hit.document_path, hit.document_title, hit.repo) == (
+            "/repo/f.md",
+            "Title",
+            "/repo",
+        )
+
+    def test_get_chunk_with_document(self, db):
+        doc_id = db.upsert_document("/repo", "/repo/f.md", "Title", "content", 1.0)
+        chunk_ids = db.insert_chunks(doc_id, [(0, "a", 0, 1), (1, "b", 1, 2)])
+        chunk, doc = db.get_chunk_with_document(chunk_ids[1])
+        assert chunk == db.get_chunk(chunk_ids[1])
+        assert doc == db.get_document(doc_id)
+
+    def test_get_chunk_with_document_missing(self, db):
+        assert db.get_chunk_with_document(9999) is None
+
+    def test_get_chunk_hits_empty(self, db):
+        assert db.get_chunk_hits([]) == {}
+
     def test_get_chunk_by_id(self, db):
         doc_id = db.upsert_document("/repo", "/repo/f.md", "T", "content", 1.0)
         chunk_ids = db.insert_chunks(doc_id, [(0, "the chunk", 0, 9)])
@@ -298,3 +604,64 @@ class TestStats:
         stats = db.stats()
         assert "db_path" in stats
         assert isinstance(stats["db_path"], str)
+
+
+class TestReadOnly:
+    """Test read-only database connections."""
+
+    def test_reads_existing_data(self, db):
+        db.upsert_document("/repo", "/repo/f.md", "T", "content", 1.0)
+        db.commit()
+        ro = Database.read_only(db.config)
+        try:
+            assert ro.get_document_by_path("/repo/f.md").title == "T"
+            assert ro.stats()["documents"] == 1
+        finally:
+            ro.close()
+
+    def test_rejects_writes(self, db):
+        ro = Database.read_only(db.config)
+        try:
+            with pytest.raises(sqlite3.OperationalError):
+                ro.upsert_document("/repo", "/repo/f.md", "T", "content", 1.0)
+        finally:
+            ro.close()
+
+    def test_reads_database_without_migrated_columns(self, tmp_path):
+        path = tmp_path / "old.db"
+        old = sqlite3.connect(str(path))
+        old.executescript(
+            "CREATE TABLE documents (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "repo TEXT NOT NULL, path TEXT NOT NULL UNIQUE, title TEXT, "
+            "content TEXT NOT NULL, content_hash TEXT NOT NULL, "
+            "last_modified REAL NOT NULL, indexed_at REAL NOT NULL);"
+            "CREATE TABLE chunks (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "document_id INTEGER NOT NULL, chunk_index INTEGER NOT NULL, "
+            "content TEXT NOT NULL, start_char INTEGER NOT NULL, "
+            "end_char INTEGER NOT NULL);"
+            "INSERT INTO documents VALUES (1, '/repo', '/repo/f.md', 'T', 'c', 'h', 1, 1);"
+            "INSERT INTO chunks VALUES (1, 1, 0, 'c', 0, 1);"
+        )
+        old.commit()
+        old.close()
+        cfg = Config()
+        cfg.db_path = path
+        ro = Database.read_only(cfg)
+        try:
+            assert ro.get_document_by_path("/repo/f.md").title == "T"
+            chunk, doc = ro.get_chunk_with_document(1)
+            assert chunk.content == "c"
+            assert doc.path == "/repo/f.md"
+        finally:
+            ro.close()
+
+    def test_does_not_create_missing_db(self, tmp_path):
+        cfg = Config()
+        cfg.db_path = tmp_path / "missing" / "test.db"
+        ro = Database.read_only(cfg)
+        try:
+            with pytest.raises(sqlite3.OperationalError):
+                ro.stats()
+            assert not cfg.db_path.parent.exists()
+        finally:
+            ro.close()
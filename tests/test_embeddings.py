@@ -54,6 +54,17 @@ class TestEmbeddingModelEncode:
         assert isinstance(result, np.ndarray)
         assert result.shape == (1, 3)
 
+    def test_encode_forwards_batch_size(self):
+        cfg = Config()
+        cfg.encode_batch_size = 16
+        emb = EmbeddingModel(cfg)
+        emb._model = mock.Mock()
+        emb._model.encode.return_value = np.zeros((2, 3))
+
+        emb.encode(["a", "b"])
+
+        assert emb._model.encode.call_args.kwargs["batch_size"] == 16
+
     def test_encode_empty_list(self):
         cfg = Config()
         cfg.embedding_model = "all-MiniLM-L6-v2"
@@ -72,3 +83,37 @@ class TestEmbeddingModelEncode:
 
         result = emb.encode_query("test query")
         assert result.shape == (3,)
+
+
+class TestModelCache:
+    """Test that loaded models are shared across EmbeddingModel instances."""
+
+    def test_model_loaded_once_per_name(self):
+        MockST = mock.Mock()
+        with mock.patch.dict(
+            "sys.modules",
+            {"sentence_transformers": mock.Mock(SentenceTransformer=MockST)},
+        ), mock.patch.dict("fizban.embeddings._MODEL_CACHE", clear=True):
+            cfg = Config()
+            cfg.embedding_model = "cached-model"
+            first = EmbeddingModel(cfg)._ensure_model()
+            second = EmbeddingModel(cfg)._ensure_model()
+
+        assert first is second
+        MockST.assert_called_once_with("cached-model", trust_remote_code=False)
+
+    def test_different_names_load_separately(self):
+        MockST = mock.Mock(side_effect=lambda name, **kw: mock.Mock(name=name))
+        with mock.patch.dict(
+            "sys.modules",
+            {"sentence_transformers": mock.Mock(SentenceTransformer=MockST)},
+        ), mock.patch.dict("fizban.embeddings._MODEL_CACHE", clear=True):
+            cfg_a = Config()
+            cfg_a.embedding_model = "model-a"
+            cfg_b = Config()
+            cfg_b.embedding_model = "model-b"
+            a = EmbeddingModel(cfg_a)._ensure_model()
+            b = EmbeddingModel(cfg_b)._ensure_model()
+
+        assert a is not b
+        assert MockST.call_count == 2
@@ -1,8 +1,16 @@
 """Tests for indexer module helper functions."""
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from unittest import mock
 
-from fizban.indexer import _identify_repo
+import numpy as np
+import pytest
+
+from fizban.config import Config
+from fizban.db import Database, content_hash
+from fizban.indexer import _identify_repo, _index_files, _read_ahead, _record
 
 
 class TestIdentifyRepo:
@@ -31,3 +39,186 @@ class TestIdentifyRepo:
     def test_empty_repos_returns_parent(self):
         result = _identify_repo(Path("/some/file.md"), [])
         assert result == "/some"
+
+
+@pytest.fixture
+def index_env(tmp_path):
+    """A real Database plus mocked vector backend and embedding model."""
+    cfg = Config()
+    cfg.db_path = tmp_path / "test.db"
+    cfg.chunk_size = 50
+    cfg.chunk_overlap = 10
+    db = Database(cfg)
+    db.init_db()
+    vector = mock.Mock()
+    embeddings = mock.Mock()
+    embeddings.encode.side_effect = lambda texts: np.arange(
+        len(texts), dtype=np.float32
+    ).reshape(-1, 1)
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    yield cfg, db, vector, embeddings, repo
+    db.close()
+
+
+class TestIndexFiles:
+    """Test batched indexing of markdown files."""
+
+    def test_encodes_all_files_in_one_call(self, index_env):
+        cfg, db, vector, embeddings, repo = index_env
+        files = []
+        for name in ("a.md", "b.md", "c.md"):
+            path = repo / name
+            path.write_text(f"# {name}\n\n" + "Some sentence here. " * 5)
+            files.append(path)
+
+        indexed = _index_files(files, str(repo), db, vector, embeddings, cfg)
+
+        assert indexed == 3
+        assert embeddings.encode.call_count == 1
+        assert vector.add_vectors.call_count == 3
+
+    def test_vectors_scattered_to_matching_chunks(self, index_env):
+        cfg, db, vector, embeddings, repo = index_env
+        files = []
+        for name in ("a.md", "b.md"):
+            path = repo / name
+            path.write_text(f"# {name}\n\n" + "Some sentence here. " * 5)
+            files.append(path)
+
+        _index_files(files, str(repo), db, vector, embeddings, cfg)
+
+        stored = {}
+        for call in vector.add_vectors.call_args_list:
+            ids, vectors = call.args
+            assert len(ids) == len(vectors)
+            stored.update(zip(ids, vectors[:, 0]))
+        all_texts = embeddings.encode.call_args.args[0]
+        for chunk_id, value in stored.items():
+            assert db.get_chunk(chunk_id).content == all_texts[int(value)]
+
+    def test_unchanged_files_skipped(self, index_env):
+        cfg, db, vector, embeddings, repo = index_env
+        path = repo / "a.md"
+        path.write_text("# A\n\nContent")
+        _index_files([path], str(repo), db, vector, embeddings, cfg)
+        embeddings.encode.reset_mock()
+
+        indexed = _index_files([path], str(repo), db, vector, embeddings, cfg)
+
+        assert indexed == 0
+        embeddings.encode.assert_not_called()
+
+    def test_unchanged_stat_skips_read(self, index_env):
+        cfg, db, vector, embeddings, repo = index_env
+        path = repo / "a.md"
+        path.write_text("# A\n\nContent")
+        _index_files([path], str(repo), db, vector, embeddings, cfg)
+
+        with mock.patch.object(Path, "read_bytes") as read_bytes:
+            indexed = _index_files([path], str(repo), db, vector, embeddings, cfg)
+
+        assert indexed == 0
+        read_bytes.assert_not_called()
+
+    def test_touched_file_records_new_stat(self, index_env):
+        cfg, db, vector, embeddings, repo = index_env
+        path = repo / "a.md"
+        path.write_text("# A\n\nContent")
+        _index_files([path], str(repo), db, vector, embeddings, cfg)
+        os.utime(path, (1_000_000.0, 1_000_000.0))
+
+        indexed = _index_files([path], str(repo), db, vector, embeddings, cfg)
+
+        assert indexed == 0
+        state = db.get_file_states(str(repo))[str(path)]
+        assert state[:2] == (1_000_000.0, path.stat().st_size)
+
+    def test_changed_file_after_unchanged_batch_is_indexed(self, index_env):
+        cfg, db, vector, embeddings, repo = index_env
+        files = []
+        for name in ("a.md", "b.md", "c.md", "d.md", "e.md"):
+            path = repo / name
+            path.write_text(f"# {name}")
+            files.append(path)
+        _index_files(files, str(repo), db, vector, embeddings, cfg)
+        files[-1].write_text("# changed")
+
+        with mock.patch("fizban.indexer.EMBED_BATCH_FILES", 2):
+            indexed = _index_files(files, str(repo), db, vector, embeddings, cfg)
+
+        assert indexed == 1
+        assert db.get_document_by_path(str(files[-1])).title == "changed"
+
+    def test_crlf_content_normalized(self, index_env):
+        cfg, db, vector, embeddings, repo = index_env
+        path = repo / "a.md"
+        path.write_bytes(b"# Title\r\n\r\nBody\r\n")
+
+        _index_files([path], str(repo), db, vector, embeddings, cfg)
+
+        doc = db.get_document_by_path(str(path))
+        assert doc.content == "# Title\n\nBody\n"
+        assert doc.content_hash == content_hash(path.read_bytes())
+
+    def test_edit_only_embeds_changed_chunks(self, index_env):
+        cfg, db, vector, embeddings, repo = index_env
+        path = repo / "a.md"
+        paragraphs = [f"Paragraph {i} has some words." for i in range(4)]
+        path.write_text("\n\n".join(paragraphs))
+        _index_files([path], str(repo), db, vector, embeddings, cfg)
+        before = {c.content: c.id for c in db.get_chunks(db.get_document_by_path(str(path)).id)}
+        embeddings.encode.reset_mock()
+
+        paragraphs[-1] = "The last paragraph was rewritten."
+        path.write_text("\n\n".join(paragraphs))
+        _index_files([path], str(repo), db, vector, embeddings, cfg)
+
+        encoded = embeddings.encode.call_args.args[0]
+        assert all(text not in before for text in encoded)
+        after = db.get_chunks(db.get_document_by_path(str(path)).id)
+        kept = [c for c in after if c.content in before]
+        assert kept and all(before[c.content] == c.id for c in kept)
+
+    def test_accepts_streamed_files(self, index_env):
+        cfg, db, vector, embeddings, repo = index_env
+        for name in ("a", "b"):
+            (repo / f"{name}.md").write_text(f"# {name}")
+        files = (repo / f"{name}.md" for name in ("a", "b"))
+
+        assert _index_files(files, str(repo), db, vector, embeddings, cfg) == 2
+
+
+class TestRecord:
+    """Test recording files as an iterator is consumed."""
+
+    def test_records_consumed_files(self):
+        seen = []
+        files = _record(iter([Path("a.md"), Path("b.md")]), seen)
+        assert next(files) == Path("a.md")
+        assert seen == [Path("a.md")]
+        assert list(files) == [Path("b.md")]
+        assert seen == [Path("a.md"), Path("b.md")]
+
+
+class TestReadAhead:
+    """Test bounded read-ahead over a thread pool."""
+
+    def test_results_in_input_order(self):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            assert list(_read_ahead(pool, lambda x: x * 2, range(10), 3)) == list(
+                range(0, 20, 2)
+            )
+
+    def test_consumes_input_lazily(self):
+        consumed = []
+
+        def items():
+            for i in range(100):
+                consumed.append(i)
+                yield i
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            results = _read_ahead(pool, lambda x: x, items(), 4)
+            assert next(results) == 0
+            assert len(consumed) == 4
@@ -21,6 +21,23 @@ class TestExtractTitle:
     def test_blank_lines_only(self):
         assert extract_title("\n\n\n") == "Untitled"
 
+    def test_fallback_skips_leading_blank_lines(self):
+        assert extract_title("\n   \n  First line  \r\nSecond") == "First line"
+
+    def test_fallback_stops_at_unicode_line_boundaries(self):
+        assert extract_title("Intro\u2028more") == "Intro"
+        assert extract_title("\x0c\x85Intro\x1cmore") == "Intro"
+
+    def test_fallback_truncates_long_line(self):
+        assert extract_title("x" * 150) == "x" * 100
+
+    def test_h1_after_inline_hashes(self):
+        content = "Use C# here\nissue #12\n# Real Title\n"
+        assert extract_title(content) == "Real Title"
+
+    def test_hash_mid_line_not_matched_as_title(self):
+        assert extract_title("first line\nnot a #heading\n") == "first line"
+
     def test_h2_not_matched_as_title(self):
         content = "## Subtitle\n# Real Title"
         assert extract_title(content) == "Real Title"
@@ -76,6 +93,67 @@ class TestExtractImages:
         assert len(images) == 1
         assert images[0].absolute_path == "/repo/docs/images/screenshots/ui.png"
 
+    def test_image_inside_repo_root_kept(self):
+        content = "![](../img/a.png)"
+        images = extract_images(
+            content, Path("/repo/docs/file.md"), repo_root=Path("/repo")
+        )
+        assert len(images) == 1
+
+    def test_path_traversal_outside_repo_root_skipped(self):
+        content = "![](../../etc/passwd)"
+        images = extract_images(
+            content, Path("/repo/docs/file.md"), repo_root=Path("/repo")
+        )
+        assert images == []
+
+    def test_sibling_dir_sharing_root_prefix_skipped(self):
+        content = "![](../../repo-other/a.png)"
+        images = extract_images(
+            content, Path("/repo/docs/file.md"), repo_root=Path("/repo")
+        )
+        assert images == []
+
+    def test_symlink_escaping_repo_root_skipped(self, tmp_path):
+        repo = tmp_path / "repo"
+        (repo / "docs").mkdir(parents=True)
+        outside = tmp_path / "outside"
+        outside.mkdir()
+        (repo / "docs" / "assets").symlink_to(outside)
+        images = extract_images(
+            "![](assets/secret.png)",
+            repo / "docs" / "file.md",
+            repo_root=repo.resolve(),
+        )
+        assert images == []
+
+    def test_symlinked_repo_root_keeps_images(self, tmp_path):
+        real = tmp_path / "real"
+        (real / "docs").mkdir(parents=True)
+        link = tmp_path / "link"
+        link.symlink_to(real)
+        images = extract_images(
+            "![](img/a.png)", link / "docs" / "file.md", repo_root=link
+        )
+        assert images[0].absolute_path == str(real / "docs" / "img" / "a.png")
+
+    def test_relative_repo_root_keeps_images(self, tmp_path, monkeypatch):
+        (tmp_path / "repo" / "docs").mkdir(parents=True)
+        monkeypatch.chdir(tmp_path)
+        parsed = parse_markdown(
+            "![](img/a.png)",
+            tmp_path.resolve() / "repo" / "docs" / "file.md",
+            repo_root=Path("repo"),
+        )
+        assert len(parsed.images) == 1
+
+    def test_filesystem_root_allows_everything(self):
+        content = "![](../../x/a.png)"
+        images = extract_images(
+            content, Path("/repo/docs/file.md"), repo_root=Path("/")
+        )
+        assert images[0].absolute_path == "/x/a.png"
+
 
 class TestParseMarkdown:
     def test_full_parse(self):
@@ -1,11 +1,12 @@
 """Tests for repository management module."""
 
 import subprocess
+import threading
 from pathlib import Path
 from unittest import mock
 
 from fizban.config import Config
-from fizban.repos import pull_all, scan_repo
+from fizban.repos import iter_markdown_files, iter_repo_files, pull_all, scan_repo
 
 
 class TestScanRepo:
@@ -55,6 +56,39 @@ class TestScanRepo:
         files = scan_repo(str(tmp_path))
         assert all(f.is_absolute() for f in files)
 
+    def test_scan_order_matches_sorted_rglob(self, tmp_path):
+        for rel in ("a.md", "a/x.md", "a-b/y.md", "B/z.md", "A.md"):
+            (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / rel).write_text("x")
+        assert scan_repo(str(tmp_path)) == sorted(tmp_path.rglob("*.md"))
+
+    def test_scan_skips_directories_named_md(self, tmp_path):
+        (tmp_path / "notes.md").mkdir()
+        (tmp_path / "notes.md" / "inner.md").write_text("x")
+        files = scan_repo(str(tmp_path))
+        assert files == [tmp_path / "notes.md" / "inner.md"]
+
+    def test_scan_skips_git_directory(self, tmp_path):
+        (tmp_path / ".git" / "info").mkdir(parents=True)
+        (tmp_path / ".git" / "info" / "notes.md").write_text("x")
+        (tmp_path / "doc.md").write_text("x")
+        assert scan_repo(str(tmp_path)) == [tmp_path / "doc.md"]
+
+    def test_iter_markdown_files_is_lazy(self, tmp_path):
+        (tmp_path / "a.md").write_text("a")
+        files = iter_markdown_files(tmp_path)
+        assert next(files) == tmp_path / "a.md"
+
+    def test_iter_repo_files_missing_repo_yields_nothing(self, caplog):
+        files = list(iter_repo_files("/nonexistent/path/that/does/not/exist"))
+        assert files == []
+        assert "Repo path does not exist" in caplog.text
+
+    def test_iter_repo_files_matches_scan(self, tmp_path):
+        (tmp_path / "b.md").write_text("b")
+        (tmp_path / "a.md").write_text("a")
+        assert list(iter_repo_files(str(tmp_path))) == scan_repo(str(tmp_path))
+
 
 class TestPullAll:
     """Test git pull operations across configured repos."""
@@ -138,6 +172,72 @@ class TestPullAll:
         assert results[str(repo1)] == "ok"
         assert results[str(repo2)] == "ok"
 
+    def test_pull_worktree_with_git_file(self, tmp_path):
+        (tmp_path / ".git").write_text("gitdir: /elsewhere/.git/worktrees/x\n")
+        cfg = Config()
+        cfg.repos = [str(tmp_path)]
+
+        mock_result = mock.Mock(returncode=0, stdout="")
+        with mock.patch("fizban.repos.subprocess.run", return_value=mock_result):
+            results = pull_all(cfg)
+
+        assert results[str(tmp_path)] == "ok"
+
+    def test_pulls_run_concurrently(self, tmp_path):
+        repos = []
+        for name in ("repo1", "repo2"):
+            (tmp_path / name / ".git").mkdir(parents=True)
+            repos.append(str(tmp_path / name))
+        cfg = Config()
+        cfg.repos = repos
+
+        # Each pull waits for the other; serial pulls would time out
+        barrier = threading.Barrier(2, timeout=5)
+
+        def fake_run(*args, **kwargs):
+            barrier.wait()
+            return mock.Mock(returncode=0, stdout="")
+
+        with mock.patch("fizban.repos.subprocess.run", side_effect=fake_run):
+            results = pull_all(cfg)
+
+        assert results == {repos[0]: "ok", repos[1]: "ok"}
+
+    def test_pull_parallel_order_independent(self, tmp_path):
+        repos = []
+        for name in ("slow", "fast"):
+            (tmp_path / name / ".git").mkdir(parents=True)
+            repos.append(str(tmp_path / name))
+        cfg = Config()
+        cfg.repos = repos
+
+        # The first repo's pull finishes only after the second one's
+        fast_done = threading.Event()
+
+        def fake_run(cmd, **kwargs):
+            if cmd[2] == repos[0]:
+                fast_done.wait(timeout=5)
+                return mock.Mock(returncode=1, stderr="slow failed")
+            fast_done.set()
+            return mock.Mock(returncode=0, stdout="")
+
+        with mock.patch("fizban.repos.subprocess.run", side_effect=fake_run):
+            results = pull_all(cfg)
+
+        assert results == {repos[0]: "error: slow failed", repos[1]: "ok"}
+
+    def test_results_follow_config_order(self, tmp_path):
+        git_repo = tmp_path / "git"
+        (git_repo / ".git").mkdir(parents=True)
+        cfg = Config()
+        cfg.repos = [str(git_repo), str(tmp_path / "missing")]
+
+        mock_result = mock.Mock(returncode=0, stdout="")
+        with mock.patch("fizban.repos.subprocess.run", return_value=mock_result):
+            results = pull_all(cfg)
+
+        assert list(results) == cfg.repos
+
     def test_pull_empty_repos_list(self):
         cfg = Config()
         cfg.repos = []
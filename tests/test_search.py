@@ -1,12 +1,47 @@
 """Tests for semantic search module."""
 
+import gc
+import threading
+import weakref
+from types import SimpleNamespace
 from unittest import mock
 
 import numpy as np
+import pytest
 
 from fizban.config import Config
-from fizban.db import ChunkRecord, DocumentRecord
-from fizban.search import SearchResult, semantic_search
+from fizban.db import ChunkHitRecord
+from fizban.search import (
+    QUERY_CACHE_SIZE,
+    SearchResult,
+    _encode_query,
+    close_search_handles,
+    semantic_search,
+    semantic_search_batch,
+)
+
+# Shared query embedding for mocked models; float32 like real model output
+ZERO_QUERY = np.zeros(384, dtype=np.float32)
+ZERO_QUERY.setflags(write=False)
+
+
+@pytest.fixture
+def search_mocks():
+    """Patch the search module's Database, EmbeddingModel and vector backend."""
+    with mock.patch("fizban.search.Database") as db, \
+            mock.patch("fizban.search.EmbeddingModel") as emb, \
+            mock.patch("fizban.search.get_vector_backend") as vec:
+        # Search opens its database read-only; route that through the mock
+        db.read_only.side_effect = db
+        yield SimpleNamespace(db=db, emb=emb, vec=vec)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_handles():
+    """Keep cached search handles (and their mocks) from leaking between tests."""
+    close_search_handles()
+    yield
+    close_search_handles()
 
 
 class TestSearchResult:
@@ -22,6 +57,14 @@ class TestSearchResult:
         assert result.document_id == 2
         assert result.distance == 0.5
 
+    def test_search_result_has_no_instance_dict(self):
+        result = SearchResult(
+            chunk_id=1, document_id=2, document_path="/repo/doc.md",
+            document_title="Doc", repo="/repo", chunk_content="text",
+            chunk_index=0, distance=0.5,
+        )
+        assert not hasattr(result, "__dict__")
+
 
 class TestSemanticSearch:
     """Test semantic_search function with mocked dependencies."""
@@ -31,32 +74,25 @@ class TestSemanticSearch:
         cfg.db_path = "/tmp/test_search.db"
         return cfg
 
-    @mock.patch("fizban.search.get_vector_backend")
-    @mock.patch("fizban.search.EmbeddingModel")
-    @mock.patch("fizban.search.Database")
-    def test_search_returns_results(self, MockDatabase, MockEmbeddings, MockVector):
+    def test_search_returns_results(self, search_mocks):
         cfg = self._make_config()
 
         # Set up mock embeddings
-        mock_emb_instance = MockEmbeddings.return_value
-        mock_emb_instance.encode_query.return_value = np.zeros(384)
+        mock_emb_instance = search_mocks.emb.return_value
+        mock_emb_instance.encode_query.return_value = ZERO_QUERY
 
         # Set up mock vector backend
-        mock_vec_instance = MockVector.return_value
+        mock_vec_instance = search_mocks.vec.return_value
         mock_vec_instance.search.return_value = [(10, 0.1), (20, 0.2)]
 
         # Set up mock database
-        mock_db_instance = MockDatabase.return_value
-        mock_db_instance.get_chunk.side_effect = lambda cid: {
-            10: ChunkRecord(id=10, document_id=1, chunk_index=0, content="chunk A", start_char=0, end_char=7),
-            20: ChunkRecord(id=20, document_id=2, chunk_index=0, content="chunk B", start_char=0, end_char=7),
-        }.get(cid)
-        mock_db_instance.get_document.side_effect = lambda did: {
-            1: DocumentRecord(id=1, repo="/repo", path="/repo/a.md", title="Doc A",
-                              content="full A", content_hash="h1", last_modified=1.0, indexed_at=1.0),
-            2: DocumentRecord(id=2, repo="/repo", path="/repo/b.md", title="Doc B",
-                              content="full B", content_hash="h2", last_modified=2.0, indexed_at=2.0),
-        }.get(did)
+        mock_db_instance = search_mocks.db.return_value
+        mock_db_instance.get_chunk_hits.return_value = {
+            20: ChunkHitRecord(id=20, document_id=2, chunk_index=0, content="chunk B",
+                               document_path="/repo/b.md", document_title="Doc B", repo="/repo"),
+            10: ChunkHitRecord(id=10, document_id=1, chunk_index=0, content="chunk A",
+                               document_path="/repo/a.md", document_title="Doc A", repo="/repo"),
+        }
 
         results = semantic_search("test query", config=cfg, limit=5)
 
@@ -68,80 +104,247 @@ class TestSemanticSearch:
         assert results[1].chunk_id == 20
         assert results[1].distance == 0.2
 
-    @mock.patch("fizban.search.get_vector_backend")
-    @mock.patch("fizban.search.EmbeddingModel")
-    @mock.patch("fizban.search.Database")
-    def test_search_skips_missing_chunks(self, MockDatabase, MockEmbeddings, MockVector):
+    def test_search_skips_missing_chunks(self, search_mocks):
         cfg = self._make_config()
 
-        mock_emb_instance = MockEmbeddings.return_value
-        mock_emb_instance.encode_query.return_value = np.zeros(384)
+        mock_emb_instance = search_mocks.emb.return_value
+        mock_emb_instance.encode_query.return_value = ZERO_QUERY
 
-        mock_vec_instance = MockVector.return_value
+        mock_vec_instance = search_mocks.vec.return_value
         mock_vec_instance.search.return_value = [(10, 0.1), (999, 0.2)]
 
-        mock_db_instance = MockDatabase.return_value
-        mock_db_instance.get_chunk.side_effect = lambda cid: (
-            ChunkRecord(id=10, document_id=1, chunk_index=0, content="chunk", start_char=0, end_char=5)
-            if cid == 10 else None
-        )
-        mock_db_instance.get_document.return_value = DocumentRecord(
-            id=1, repo="/repo", path="/repo/a.md", title="Doc A",
-            content="full", content_hash="h", last_modified=1.0, indexed_at=1.0,
-        )
+        mock_db_instance = search_mocks.db.return_value
+        mock_db_instance.get_chunk_hits.return_value = {
+            10: ChunkHitRecord(id=10, document_id=1, chunk_index=0, content="chunk",
+                               document_path="/repo/a.md", document_title="Doc A", repo="/repo"),
+        }
 
         results = semantic_search("query", config=cfg)
         assert len(results) == 1
         assert results[0].chunk_id == 10
 
-    @mock.patch("fizban.search.get_vector_backend")
-    @mock.patch("fizban.search.EmbeddingModel")
-    @mock.patch("fizban.search.Database")
-    def test_search_skips_missing_documents(self, MockDatabase, MockEmbeddings, MockVector):
+    def test_search_skips_missing_documents(self, search_mocks):
         cfg = self._make_config()
 
-        mock_emb_instance = MockEmbeddings.return_value
-        mock_emb_instance.encode_query.return_value = np.zeros(384)
+        mock_emb_instance = search_mocks.emb.return_value
+        mock_emb_instance.encode_query.return_value = ZERO_QUERY
 
-        mock_vec_instance = MockVector.return_value
+        mock_vec_instance = search_mocks.vec.return_value
         mock_vec_instance.search.return_value = [(10, 0.1)]
 
-        mock_db_instance = MockDatabase.return_value
-        mock_db_instance.get_chunk.return_value = ChunkRecord(
-            id=10, document_id=999, chunk_index=0, content="orphan", start_char=0, end_char=6,
-        )
-        mock_db_instance.get_document.return_value = None
+        mock_db_instance = search_mocks.db.return_value
+        # The chunk's document is gone, so the join returns nothing for it
+        mock_db_instance.get_chunk_hits.return_value = {}
 
         results = semantic_search("query", config=cfg)
         assert len(results) == 0
 
-    @mock.patch("fizban.search.get_vector_backend")
-    @mock.patch("fizban.search.EmbeddingModel")
-    @mock.patch("fizban.search.Database")
-    def test_search_empty_results(self, MockDatabase, MockEmbeddings, MockVector):
+    def test_search_empty_results(self, search_mocks):
         cfg = self._make_config()
 
-        mock_emb_instance = MockEmbeddings.return_value
-        mock_emb_instance.encode_query.return_value = np.zeros(384)
+        mock_emb_instance = search_mocks.emb.return_value
+        mock_emb_instance.encode_query.return_value = ZERO_QUERY
 
-        mock_vec_instance = MockVector.return_value
+        mock_vec_instance = search_mocks.vec.return_value
         mock_vec_instance.search.return_value = []
 
         results = semantic_search("query", config=cfg)
         assert results == []
 
-    @mock.patch("fizban.search.get_vector_backend")
-    @mock.patch("fizban.search.EmbeddingModel")
-    @mock.patch("fizban.search.Database")
-    def test_search_passes_limit(self, MockDatabase, MockEmbeddings, MockVector):
+    def test_search_passes_limit(self, search_mocks):
         cfg = self._make_config()
 
-        mock_emb_instance = MockEmbeddings.return_value
-        mock_emb_instance.encode_query.return_value = np.zeros(384)
+        mock_emb_instance = search_mocks.emb.return_value
+        mock_emb_instance.encode_query.return_value = ZERO_QUERY
 
-        mock_vec_instance = MockVector.return_value
+        mock_vec_instance = search_mocks.vec.return_value
         mock_vec_instance.search.return_value = []
 
         semantic_search("query", config=cfg, limit=3)
 
-        mock_vec_instance.search.assert_called_once_with(mock.ANY, limit=3)
+        mock_vec_instance.search.assert_called_once_with(
+            mock.ANY, limit=3, distance_threshold=cfg.distance_threshold
+        )
+
+    def test_search_pushes_threshold_to_backend(self, search_mocks):
+        cfg = self._make_config()
+        search_mocks.emb.return_value.encode_query.return_value = ZERO_QUERY
+        search_mocks.vec.return_value.search.return_value = [(10, 0.1), (20, 0.5)]
+        mock_db_instance = search_mocks.db.return_value
+        mock_db_instance.get_chunk_hits.return_value = {}
+
+        semantic_search("query", config=cfg, limit=4, distance_threshold=0.6)
+
+        search_mocks.vec.return_value.search.assert_called_once_with(
+            mock.ANY, limit=4, distance_threshold=0.6
+        )
+        mock_db_instance.get_chunk_hits.assert_called_once_with([10, 20])
+
+    def test_search_deduplicates_hits(self, search_mocks):
+        cfg = self._make_config()
+        search_mocks.emb.return_value.encode_query.return_value = ZERO_QUERY
+        search_mocks.vec.return_value.search.return_value = [(10, 0.2), (10, 0.1), (20, 0.3)]
+        mock_db_instance = search_mocks.db.return_value
+        mock_db_instance.get_chunk_hits.side_effect = lambda ids: {
+            i: ChunkHitRecord(id=i, document_id=i, chunk_index=0, content="chunk",
+                              document_path=f"/repo/{i}.md", document_title="Doc",
+                              repo="/repo")
+            for i in ids
+        }
+
+        results = semantic_search("query", config=cfg)
+
+        assert [(r.chunk_id, r.distance) for r in results] == [(10, 0.1), (20, 0.3)]
+        mock_db_instance.get_chunk_hits.assert_called_once_with([10, 20])
+
+
+class TestSemanticSearchBatch:
+    """Test semantic_search_batch with mocked dependencies."""
+
+    def test_search_batch_matches_individual(self, search_mocks):
+        cfg = Config()
+        queries = ["first", "second"]
+        vectors = {"first": np.full(384, 1.0), "second": np.full(384, 2.0)}
+        hits = {1.0: [(10, 0.1), (20, 0.3)], 2.0: [(20, 0.2)]}
+        search_mocks.emb.return_value.encode_query.side_effect = lambda q: vectors[q]
+        search_mocks.emb.return_value.encode.side_effect = lambda qs: np.stack(
+            [vectors[q] for q in qs])
+        search_mocks.vec.return_value.search.side_effect = (
+            lambda v, limit, distance_threshold: hits[float(v[0])])
+        search_mocks.db.return_value.get_chunk_hits.side_effect = lambda ids: {
+            i: ChunkHitRecord(id=i, document_id=i, chunk_index=0, content=f"chunk {i}",
+                              document_path=f"/repo/{i}.md", document_title=f"Doc {i}",
+                              repo="/repo")
+            for i in ids
+        }
+
+        batched = semantic_search_batch(queries, config=cfg, limit=5)
+        individual = [semantic_search(q, config=cfg, limit=5) for q in queries]
+
+        assert batched == individual
+        search_mocks.emb.return_value.encode.assert_called_once_with(queries)
+
+    def test_search_batch_fetches_hits_once(self, search_mocks):
+        search_mocks.emb.return_value.encode.return_value = np.zeros((3, 384))
+        search_mocks.vec.return_value.search.return_value = [(10, 0.1)]
+        search_mocks.db.return_value.get_chunk_hits.return_value = {}
+
+        results = semantic_search_batch(["a", "b", "c"], config=Config())
+
+        assert results == [[], [], []]
+        search_mocks.db.return_value.get_chunk_hits.assert_called_once_with([10])
+
+    def test_search_batch_empty(self, search_mocks):
+        assert semantic_search_batch([], config=Config()) == []
+        search_mocks.emb.assert_not_called()
+
+
+class TestSearchHandles:
+    """Test reuse of database, model and vector handles across searches."""
+
+    def test_handles_reused_across_calls(self, search_mocks):
+        cfg = Config()
+        search_mocks.emb.return_value.encode_query.return_value = ZERO_QUERY
+        search_mocks.vec.return_value.search.return_value = []
+
+        semantic_search("one", config=cfg)
+        semantic_search("two", config=cfg)
+
+        assert search_mocks.db.read_only.call_count == 1
+        assert search_mocks.emb.call_count == 1
+        assert search_mocks.vec.call_count == 1
+
+    def test_new_handles_for_different_db(self, search_mocks):
+        search_mocks.emb.return_value.encode_query.return_value = ZERO_QUERY
+        search_mocks.vec.return_value.search.return_value = []
+        first, second = Config(), Config()
+        first.db_path = "/tmp/a.db"
+        second.db_path = "/tmp/b.db"
+
+        semantic_search("q", config=first)
+        semantic_search("q", config=second)
+
+        assert search_mocks.db.call_count == 2
+
+    def test_close_search_handles_closes_connections(self, search_mocks):
+        search_mocks.emb.return_value.encode_query.return_value = ZERO_QUERY
+        search_mocks.vec.return_value.search.return_value = []
+
+        semantic_search("q", config=Config())
+        close_search_handles()
+
+        search_mocks.db.return_value.close.assert_called_once()
+        search_mocks.vec.return_value.close.assert_called_once()
+
+    def test_repeated_query_encoded_once(self, search_mocks):
+        cfg = Config()
+        search_mocks.emb.return_value.encode_query.side_effect = lambda q: ZERO_QUERY
+        search_mocks.vec.return_value.search.return_value = []
+
+        semantic_search("same", config=cfg)
+        semantic_search("same", config=cfg)
+        semantic_search("other", config=cfg)
+
+        encoded = [c.args[0] for c in search_mocks.emb.return_value.encode_query.call_args_list]
+        assert encoded == ["same", "other"]
+
+    def test_exited_thread_handles_released(self, search_mocks):
+        refs = []
+
+        class FakeDatabase:
+            def __init__(self, config):
+                refs.append(weakref.ref(self))
+
+            def get_chunk_hits(self, ids):
+                return {}
+
+        search_mocks.db.side_effect = FakeDatabase
+        search_mocks.emb.return_value.encode_query.return_value = ZERO_QUERY
+        search_mocks.vec.return_value.search.return_value = []
+
+        thread = threading.Thread(target=semantic_search, args=("q",),
+                                  kwargs={"config": Config()})
+        thread.start()
+        thread.join()
+        gc.collect()
+
+        assert len(refs) == 1
+        assert refs[0]() is None
+
+
+class TestQueryCache:
+    """Test the query embedding cache."""
+
+    def _model(self, name):
+        model = mock.Mock()
+        model.config.embedding_model = name
+        model.encode_query.side_effect = lambda q: ZERO_QUERY.copy()
+        return model
+
+    def test_shared_across_handles_of_same_model(self):
+        first, second = self._model("m"), self._model("m")
+        _encode_query(first, "q")
+        _encode_query(second, "q")
+        first.encode_query.assert_called_once_with("q")
+        second.encode_query.assert_not_called()
+
+    def test_separate_per_model_name(self):
+        first, second = self._model("m1"), self._model("m2")
+        _encode_query(first, "q")
+        _encode_query(second, "q")
+        second.encode_query.assert_called_once_with("q")
+
+    def test_cached_arrays_are_read_only(self):
+        embedding = _encode_query(self._model("m"), "q")
+        assert not embedding.flags.writeable
+
+    def test_bounded_least_recently_used_evicted(self):
+        model = self._model("m")
+        for i in range(QUERY_CACHE_SIZE):
+            _encode_query(model, f"q{i}")
+        _encode_query(model, "q0")  # refresh the oldest entry
+        _encode_query(model, "new")  # evicts q1
+        model.encode_query.reset_mock()
+        _encode_query(model, "q0")
+        _encode_query(model, "q1")
+        assert [c.args[0] for c in model.encode_query.call_args_list] == ["q1"]
@@ -55,24 +55,49 @@ class TestGetVectorBackend:
         cfg = Config()
         cfg.vector_backend = "vec"
 
-        # Make vec import fail, but vss succeed
+        # Make vec construction fail, but vss succeed
         with mock.patch(
             "fizban.vector.vec_backend.SqliteVecBackend",
             side_effect=ImportError("no sqlite-vec"),
         ):
-            with mock.patch("fizban.vector.vss_backend.sqlite_vss", create=True):
-                with mock.patch(
-                    "fizban.vector.vss_backend.SqliteVssBackend.__init__",
-                    return_value=None,
-                ):
-                    # Need to patch the import inside get_vector_backend
-                    with mock.patch.dict(
-                        "sys.modules",
-                        {"sqlite_vec": None},
-                    ):
-                        # The factory catches ImportError and falls back
-                        # This tests the fallback path in get_vector_backend
-                        pass
+            with mock.patch(
+                "fizban.vector.vss_backend.SqliteVssBackend.__init__",
+                return_value=None,
+            ):
+                backend = get_vector_backend(cfg)
+                from fizban.vector.vss_backend import SqliteVssBackend
+                assert isinstance(backend, SqliteVssBackend)
+
+    def test_vss_fallback_to_vec(self):
+        """When sqlite-vss is unavailable, vss backend falls back to vec."""
+        cfg = Config()
+        cfg.vector_backend = "vss"
+
+        with mock.patch(
+            "fizban.vector.vss_backend.SqliteVssBackend",
+            side_effect=ImportError("no sqlite-vss"),
+        ):
+            with mock.patch(
+                "fizban.vector.vec_backend.SqliteVecBackend.__init__",
+                return_value=None,
+            ):
+                backend = get_vector_backend(cfg)
+                from fizban.vector.vec_backend import SqliteVecBackend
+                assert isinstance(backend, SqliteVecBackend)
+
+    def test_missing_extension_without_fallback_raises(self):
+        cfg = Config()
+        cfg.vector_backend = "vec"
+        with mock.patch(
+            "fizban.vector.vec_backend.SqliteVecBackend",
+            side_effect=ImportError("no sqlite-vec"),
+        ):
+            with mock.patch(
+                "fizban.vector.vss_backend.SqliteVssBackend",
+                side_effect=ImportError("no sqlite-vss"),
+            ):
+                with pytest.raises(ImportError, match="no sqlite-vss"):
+                    get_vector_backend(cfg)
 
     def test_case_insensitive_backend_name(self):
         cfg = Config()
@@ -118,3 +143,260 @@ class TestSerializeF32:
         serialized = _serialize_f32(vec)
         unpacked = struct.unpack("3f", serialized)
         assert unpacked == pytest.approx([0.5, -1.5, 3.14], abs=1e-5)
+
+    def test_serialize_non_contiguous_and_float64(self):
+        import numpy as np
+        from fizban.vector.vec_backend import _serialize_f32
+
+        matrix = np.arange(6, dtype=np.float64).reshape(2, 3)
+        serialized = _serialize_f32(matrix[:, 1])
+        assert np.frombuffer(serialized, dtype=np.float32).tolist() == [1.0, 4.0]
+
+
+class TestVssVectorJson:
+    """Test the JSON vector encoding from vss_backend."""
+
+    def test_round_trips_float32_exactly(self):
+        import json
+        import numpy as np
+        from fizban.vector.vss_backend import _vector_json
+
+        vec = np.random.default_rng(0).normal(size=384).astype(np.float32)
+        decoded = np.array(json.loads(_vector_json(vec.tolist())), dtype=np.float32)
+        assert np.array_equal(decoded, vec)
+
+    def test_empty_vector(self):
+        from fizban.vector.vss_backend import _vector_json
+
+        assert _vector_json([]) == "[]"
+
+
+@pytest.fixture
+def vec_backend(tmp_path):
+    """A SqliteVecBackend over a plain table standing in for vec0."""
+    import sqlite3
+    from fizban.vector.vec_backend import SqliteVecBackend
+
+    cfg = Config()
+    cfg.db_path = tmp_path / "vec.db"
+    with mock.patch.dict("sys.modules", {"sqlite_vec": mock.MagicMock()}):
+        backend = SqliteVecBackend(cfg)
+    backend._conn = sqlite3.connect(str(cfg.db_path))
+    backend._conn.execute(
+        "CREATE TABLE vec_chunks (chunk_id INTEGER PRIMARY KEY, embedding BLOB)"
+    )
+    yield backend
+    backend.close()
+
+
+class TestSqliteVecAddVectors:
+    """Test batched vector inserts in SqliteVecBackend."""
+
+    def test_rows_stored_as_float32_bytes(self, vec_backend):
+        import numpy as np
+
+        vectors = np.array([[1.0, 2.0], [3.0, 4.0]], dtype=np.float64)
+        vec_backend.add_vectors([7, 9], vectors)
+        rows = vec_backend.conn.execute(
+            "SELECT chunk_id, embedding FROM vec_chunks ORDER BY chunk_id"
+        ).fetchall()
+        assert [r[0] for r in rows] == [7, 9]
+        assert np.frombuffer(rows[1][1], dtype=np.float32).tolist() == [3.0, 4.0]
+
+    def test_replaces_existing_ids(self, vec_backend):
+        import numpy as np
+
+        vec_backend.add_vectors([1], np.array([[1.0, 1.0]]))
+        vec_backend.add_vectors([1], np.array([[2.0, 2.0]]))
+        rows = vec_backend.conn.execute("SELECT embedding FROM vec_chunks").fetchall()
+        assert len(rows) == 1
+        assert np.frombuffer(rows[0][0], dtype=np.float32).tolist() == [2.0, 2.0]
+
+    def test_committed_for_other_connections(self, vec_backend):
+        import sqlite3
+        import numpy as np
+
+        vec_backend.add_vectors([1, 2], np.ones((2, 3)))
+        other = sqlite3.connect(str(vec_backend.config.db_path))
+        try:
+            assert other.execute("SELECT COUNT(*) FROM vec_chunks").fetchone()[0] == 2
+        finally:
+            other.close()
+
+    def test_close_releases_connection(self, vec_backend):
+        vec_backend.close()
+        assert vec_backend._conn is None
+        vec_backend.close()
+
+    def test_empty_ids_is_noop(self, vec_backend):
+        import numpy as np
+
+        vec_backend.add_vectors([], np.empty((0, 3)))
+        assert vec_backend.count() == 0
+
+
+class TestSqliteVecSearch:
+    """Test the KNN query issued by SqliteVecBackend.search."""
+
+    @pytest.fixture
+    def knn_backend(self, vec_backend):
+        """Stand-in vec0 table: k and distance are plain columns, MATCH is true."""
+        conn = vec_backend.conn
+        conn.execute("ALTER TABLE vec_chunks ADD COLUMN distance REAL")
+        conn.execute("ALTER TABLE vec_chunks ADD COLUMN k INTEGER")
+        conn.create_function("match", 2, lambda query, embedding: 1)
+        conn.executemany(
+            "INSERT INTO vec_chunks (chunk_id, embedding, distance, k) VALUES (?, x'', ?, 3)",
+            [(1, 0.5), (2, 0.1), (3, 0.3)],
+        )
+        return vec_backend
+
+    def test_limit_passed_as_k_constraint(self, knn_backend):
+        import numpy as np
+
+        statements = []
+        knn_backend.conn.set_trace_callback(statements.append)
+        hits = knn_backend.search(np.zeros(2), limit=3)
+        assert hits == [(2, 0.1), (3, 0.3), (1, 0.5)]
+        assert "AND k = 3" in statements[-1]
+        assert "LIMIT" not in statements[-1]
+
+    def test_threshold_keeps_order(self, knn_backend):
+        import numpy as np
+
+        hits = knn_backend.search(np.zeros(2), limit=3, distance_threshold=0.4)
+        assert hits == [(2, 0.1), (3, 0.3)]
+
+
+class TestQuantizeInt8:
+    """Test int8 quantization from vec_backend."""
+
+    def test_unit_vector_scaled_to_127(self):
+        import numpy as np
+        from fizban.vector.vec_backend import quantize_int8
+
+        q = quantize_int8(np.array([0.0, 3.0, -4.0]))
+        assert q.dtype == np.int8
+        assert list(q) == [0, 76, -102]
+
+    def test_rows_normalized_independently(self):
+        import numpy as np
+        from fizban.vector.vec_backend import quantize_int8
+
+        q = quantize_int8(np.array([[10.0, 0.0], [0.0, -0.5]]))
+        assert q.tolist() == [[127, 0], [0, -127]]
+
+    def test_zero_vector_stays_zero(self):
+        import numpy as np
+        from fizban.vector.vec_backend import quantize_int8
+
+        assert quantize_int8(np.zeros(4)).tolist() == [0, 0, 0, 0]
+
+    def test_distance_preserved_after_rescale(self):
+        import numpy as np
+        from fizban.vector.vec_backend import INT8_SCALE, quantize_int8
+
+        rng = np.random.default_rng(0)
+        a, b = rng.normal(size=(2, 384))
+        a /= np.linalg.norm(a)
+        b /= np.linalg.norm(b)
+        qa, qb = quantize_int8(np.stack([a, b])).astype(np.float32)
+        approx = np.linalg.norm(qa - qb) / INT8_SCALE
+        assert approx == pytest.approx(np.linalg.norm(a - b), abs=0.01)
+
+
+@pytest.fixture
+def vss_backend(tmp_path):
+    """A SqliteVssBackend over plain tables standing in for vss0."""
+    import sqlite3
+    from fizban.vector.vss_backend import SqliteVssBackend
+
+    cfg = Config()
+    cfg.db_path = tmp_path / "vss.db"
+    with mock.patch.dict("sys.modules", {"sqlite_vss": mock.MagicMock()}):
+        backend = SqliteVssBackend(cfg)
+    backend._conn = sqlite3.connect(str(cfg.db_path))
+    backend._conn.executescript(
+        """CREATE TABLE vss_chunks (rowid INTEGER PRIMARY KEY, embedding TEXT);
+           CREATE TABLE vss_chunk_map (
+               rowid INTEGER PRIMARY KEY AUTOINCREMENT,
+               chunk_id INTEGER NOT NULL UNIQUE
+           );"""
+    )
+    yield backend
+    backend.close()
+
+
+class TestSqliteVssWrites:
+    """Test batched vector writes in SqliteVssBackend."""
+
+    def _stored(self, backend):
+        import json
+
+        rows = backend.conn.execute(
+            """SELECT m.chunk_id, v.embedding FROM vss_chunk_map m
+               JOIN vss_chunks v ON v.rowid = m.rowid ORDER BY m.chunk_id"""
+        ).fetchall()
+        return {chunk_id: json.loads(emb) for chunk_id, emb in rows}
+
+    def test_add_maps_each_chunk_to_its_vector(self, vss_backend):
+        import numpy as np
+
+        vss_backend.add_vectors([5, 3], np.array([[1.0, 2.0], [3.0, 4.0]]))
+        assert self._stored(vss_backend) == {5: [1.0, 2.0], 3: [3.0, 4.0]}
+
+    def test_add_replaces_existing_ids(self, vss_backend):
+        import numpy as np
+
+        vss_backend.add_vectors([1, 2], np.array([[1.0, 1.0], [2.0, 2.0]]))
+        vss_backend.add_vectors([2], np.array([[9.0, 9.0]]))
+        assert self._stored(vss_backend) == {1: [1.0, 1.0], 2: [9.0, 9.0]}
+        assert (
+            vss_backend.conn.execute("SELECT COUNT(*) FROM vss_chunks").fetchone()[0]
+            == 2
+        )
+
+    def test_add_repeated_id_keeps_last_vector(self, vss_backend):
+        import numpy as np
+
+        vss_backend.add_vectors([1, 1], np.array([[1.0, 1.0], [2.0, 2.0]]))
+        assert self._stored(vss_backend) == {1: [2.0, 2.0]}
+
+    def test_delete_removes_vector_and_mapping(self, vss_backend):
+        import numpy as np
+
+        vss_backend.add_vectors([1, 2, 3], np.ones((3, 2)))
+        vss_backend.delete_vectors([1, 3])
+        assert list(self._stored(vss_backend)) == [2]
+        assert (
+            vss_backend.conn.execute("SELECT COUNT(*) FROM vss_chunks").fetchone()[0]
+            == 1
+        )
+        assert vss_backend.count() == 1
+
+
+class TestSqliteVssSearch:
+    """Test the rowid-to-chunk mapping in SqliteVssBackend.search."""
+
+    def _seed(self, backend, rows):
+        # Stand-in: a stored distance column and a vss_search that matches all
+        conn = backend.conn
+        conn.execute("ALTER TABLE vss_chunks ADD COLUMN distance REAL")
+        conn.create_function("vss_search", 2, lambda embedding, query: 1)
+        for row_id, chunk_id, distance in rows:
+            conn.execute("INSERT INTO vss_chunk_map (rowid, chunk_id) VALUES (?, ?)", (row_id, chunk_id))
+            conn.execute("INSERT INTO vss_chunks (rowid, embedding, distance) VALUES (?, '[]', ?)", (row_id, distance))
+
+    def test_returns_chunk_ids_by_distance(self, vss_backend):
+        import numpy as np
+
+        self._seed(vss_backend, [(1, 100, 0.7), (2, 200, 0.2), (3, 300, 0.4)])
+        hits = vss_backend.search(np.zeros(2), limit=10)
+        assert hits == [(200, 0.2), (300, 0.4), (100, 0.7)]
+
+    def test_applies_distance_threshold(self, vss_backend):
+        import numpy as np
+
+        self._seed(vss_backend, [(1, 100, 0.7), (2, 200, 0.2), (3, 300, 0.4)])
+        hits = vss_backend.search(np.zeros(2), limit=10, distance_threshold=0.5)
+        assert hits == [(200, 0.2), (300, 0.4)]